@@ -1,20 +1,49 @@
-from fastapi import FastAPI, File, UploadFile, Form, Depends, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-import tempfile
-import os
-from pathlib import Path
+from fastapi.responses import JSONResponse, ORJSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+import asyncio
+import json
+import time
 from typing import List, Optional
 
 from core.config import get_settings
-from core.database import get_db, init_db
-from core.schemas import MoodAnalysisResponse, AnalysisHistoryResponse, FusionMatrixResponse
-from models.voice_analysis import VoiceAnalysis
+from core.admission import AdmissionRejected, get_admission_controller
+from core.database import SessionLocal, get_db, init_db
+from core.metrics import (
+    HTTP_ERRORS,
+    HTTP_REQUEST_SECONDS,
+    HTTP_REQUESTS_IN_FLIGHT,
+    format_server_timing,
+    observe_stage
+)
+from core.profiling import RequestProfile, get_profile_store, request_profile, require_profiling_token
+from core.schemas import (
+    MoodAnalysisResponse,
+    AnalysisHistoryResponse,
+    FusionMatrixResponse,
+    BatchAnalysisResponse,
+    BatchItemResult,
+    JobResponse,
+    MoodStatsResponse
+)
 from models.voice_matrix import VoiceMatrix
-from services.whisper_local_service import get_whisper_service
+from services.audio_preprocessing import get_audio_preprocessor
 from services.audio_emotion import get_audio_emotion_service
 from services.text_emotion import get_text_emotion_service
+from services.analysis_pipeline import NoSpeechDetected, build_mood_result, get_analysis_pipeline
+from services.analysis_store import HISTORY_FIELDS, InvalidCursor, query_history
+from services.analysis_writer import get_analysis_writer
+from services.asr_cascade import get_asr_cascade
 from services.fusion_service import FusionService
+from services.result_cache import ResultCache, get_result_cache
+from services.job_queue import JobQueue, JobQueueFull, callback_allowed, get_job_queue
+from services.model_loader import get_model_loader
+from services.mood_stats import GRANULARITIES, backfill_mood_stats, query_mood_stats
+from services.streaming_analysis import StreamingAnalysisSession, get_streaming_session_limiter
+from services.upload_ingest import UploadRoute, collect_batch_uploads, ingest_upload
 
 # Initialize app
 app = FastAPI(
@@ -25,6 +54,10 @@ app = FastAPI(
 
 settings = get_settings()
 
+# Upload bodies are size-checked before spooling (memory up to
+# UPLOAD_SPOOL_MAX_MEMORY, then disk)
+app.router.route_class = UploadRoute
+
 # CORS configuration for mobile/web access
 app.add_middleware(
     CORSMiddleware,
@@ -32,20 +65,54 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-# Initialize services (lazy-loaded on first use)
-# whisper_service loaded via get_whisper_service() singleton
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Track in-flight requests, latency and error responses per route."""
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    start_time = time.time()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        # Route templates (not raw paths) keep label cardinality bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUEST_SECONDS.labels(method=request.method, route=route).observe(time.time() - start_time)
+        if status >= 400:
+            HTTP_ERRORS.labels(method=request.method, route=route, status=str(status)).inc()
+
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database and models on startup."""
-    init_db()
-    # Preload ML models
-    get_audio_emotion_service()
-    get_text_emotion_service()
-    # Faster-whisper model loads on first use (lazy loading)
+    """Initialize database and start loading models on startup."""
+    await init_db()
+    # Build the /api/stats rollup from existing history before recording new analyses
+    async with SessionLocal() as db:
+        await backfill_mood_stats(db)
+    # Load the fusion matrix into memory so analyses don't query it
+    async with SessionLocal() as db:
+        await FusionService.get_all_matrix_entries(db)
+    # Load and warm up all models in parallel; /health/ready reports progress
+    get_model_loader().start()
+    # Background workers for /api/jobs
+    get_job_queue().start()
+    # Bulk-inserts buffered analyses when WRITE_BEHIND_ENABLED is set
+    get_analysis_writer().start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers and flush buffered analyses."""
+    await get_job_queue().stop()
+    await get_analysis_writer().stop()
 
 
 @app.get("/")
@@ -58,171 +125,515 @@ async def root():
     }
 
 
+@app.get("/health/live")
+async def health_live():
+    """Liveness probe: the process is up (models may still be loading)."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness probe: 200 once every model is loaded and warmed up, else 503."""
+    loader = get_model_loader()
+    return JSONResponse(
+        status_code=200 if loader.is_ready else 503,
+        content=loader.stats()
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage latency histograms, skips, errors, caches and model state."""
+    return Response(content=generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+
+@app.get("/api/status")
+async def get_status():
+    """Report model state, inference queue depth, wait times, batching and cache stats."""
+    loader = get_model_loader()
+    if not loader.is_ready:
+        return {"models": loader.stats()}
+
+    return {
+        "models": loader.stats(),
+        "inference_backend": {
+            "audio_emotion": get_audio_emotion_service().backend,
+            "text_emotion": get_text_emotion_service().backend
+        },
+        "asr_cascade": get_asr_cascade().stats(),
+        "admission": get_admission_controller().stats(),
+        "text_batching": get_text_emotion_service().batcher.stats(),
+        "text_emotion_cache": get_text_emotion_service().cache.stats(),
+        "audio_batching": get_audio_emotion_service().batcher.stats(),
+        "result_cache": get_result_cache().stats(),
+        "jobs": get_job_queue().stats(),
+        "streaming": get_streaming_session_limiter().stats(),
+        "write_behind": get_analysis_writer().stats()
+    }
+
+
 @app.post("/api/analyze", response_model=MoodAnalysisResponse)
 async def analyze_voice(
+    response: Response,
     file: UploadFile = File(...),
     transcribed_text: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    include_timeline: bool = Form(False),
+    profile: Optional[RequestProfile] = Depends(request_profile)
 ):
     """
     Analyze uploaded audio file for mood detection.
 
     Process:
     1. Transcribe audio using local faster-whisper (much faster than OpenAI API)
-    2. Detect emotion from audio using Wav2Vec2
+    2. Detect emotion from audio using Wav2Vec2 (concurrently with step 1)
     3. Detect emotion from text using DistilRoBERTa
     4. Fuse emotions using fusion matrix
     5. Save results to database
     6. Return mood analysis
 
+    Identical uploads are answered from the result cache (X-Cache: HIT), or
+    share the analysis already in progress (X-Cache: COALESCED). The
+    Server-Timing header breaks down where this request's time went.
+
+    Allow-listed callers can send X-Profile-Token (or ?profile=) to have the
+    request profiled; it then bypasses the result cache and the profile is
+    available at /api/profiles/{X-Profile-Id}.
+
     Args:
+        response: Outgoing response (used to set the X-Cache and Server-Timing headers)
         file: Audio file to analyze
         transcribed_text: Optional pre-transcribed text (deprecated, kept for backward compatibility)
-        db: Database session
+        include_timeline: Return per-window audio emotions for long recordings
+                          and the timed transcript segments
+        profile: Set when an allow-listed caller asked for a profile
     """
-    temp_file_path = None
-    import time
+    try:
+        get_model_loader().require_ready()
+        request_start = time.time()
+
+        # Validate type up front, then hash and size-check in one streaming pass
+        upload = await ingest_upload(file)
+        timings = {"upload": time.time() - request_start}
+        observe_stage("upload", timings["upload"])
+
+        pipeline = get_analysis_pipeline()
+
+        async def analyze() -> dict:
+            # Wait for an inference slot; rejects with 503 when the queue is full
+            async with get_admission_controller().admit():
+                # Steps 1-3: Decode once, transcribe and detect audio emotion
+                # concurrently, then detect emotion from the transcript
+                result = await pipeline.decode_and_run(upload.file, upload.format)
+
+            # Steps 4-5: Fuse emotions using fusion matrix and save to database
+            analysis_result = await pipeline.finalize(result)
+            timings.update(result["timings"])
+            return analysis_result
+
+        if profile is not None:
+            # A cache hit would have nothing to profile; always run the models
+            try:
+                with profile.activate():
+                    analysis_result = await analyze()
+            finally:
+                get_profile_store().set(profile.id, profile)
+                print(f"[INFO] Stored profile {profile.id} for {profile.path}")
+            source = "bypass"
+            response.headers["X-Profile-Id"] = profile.id
+        else:
+            cache_key = ResultCache.make_key(upload.sha256, pipeline.model_fingerprint())
+            analysis_result, source = await get_result_cache().get_or_compute(cache_key, analyze)
+        response.headers["X-Cache"] = source.upper()
+        # Cache hits and coalesced requests only report upload and total time
+        timings["total"] = time.time() - request_start
+        response.headers["Server-Timing"] = f'{format_server_timing(timings)}, cache;desc="{source}"'
+        response.headers["Timing-Allow-Origin"] = "*"
 
+        # Step 6: Return response
+        return MoodAnalysisResponse(**{
+            **analysis_result,
+            "audio_timeline": analysis_result["audio_timeline"] if include_timeline else None,
+            "transcript_segments": analysis_result["transcript_segments"] if include_timeline else None
+        })
+
+    except HTTPException:
+        raise
+    except NoSpeechDetected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
+@app.post(
+    "/api/analyze/batch",
+    response_model=BatchAnalysisResponse,
+    openapi_extra={"x-max-body-size": settings.BATCH_MAX_TOTAL_SIZE, "x-audio-parts-only": False}
+)
+async def analyze_voice_batch(
+    files: List[UploadFile] = File(...),
+    include_timeline: bool = Form(False)
+):
+    """
+    Analyze several audio files (or zip archives of them) in one request.
+
+    Clips are decoded in parallel and transcribed concurrently (long ones
+    in chunks, as in /api/analyze), then run through batched audio emotion
+    and text emotion passes; all successful results are saved
+    with one multi-row INSERT. Failures are reported per item.
+
+    Args:
+        files: Audio files and/or zip archives of audio files
+        include_timeline: Return per-window audio emotions for long recordings
+    """
     try:
-        # Validate file size
-        file_size = 0
-        chunk_size = 1024 * 1024  # 1MB chunks
-        temp_data = []
-
-        while chunk := await file.read(chunk_size):
-            file_size += len(chunk)
-            if file_size > settings.MAX_UPLOAD_SIZE:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"File too large. Maximum size is {settings.MAX_UPLOAD_SIZE / (1024*1024)}MB"
+        get_model_loader().require_ready()
+        # Unpacking zips reads and copies up to BATCH_MAX_TOTAL_SIZE; keep it off the event loop
+        items = await asyncio.to_thread(collect_batch_uploads, files)
+        errors = {i: item.error for i, item in enumerate(items) if item.error}
+        valid = [i for i in range(len(items)) if i not in errors]
+        results = {}
+
+        if valid:
+            # The whole batch takes a single inference slot
+            async with get_admission_controller().admit():
+                start_time = time.time()
+                preprocessor = get_audio_preprocessor()
+                decoded = await asyncio.gather(
+                    *(asyncio.to_thread(preprocessor.decode, items[i].source, items[i].format) for i in valid),
+                    return_exceptions=True
                 )
-            temp_data.append(chunk)
+                observe_stage("batch_decode", time.time() - start_time)
+
+                audio_indices, audios = [], []
+                for i, audio in zip(valid, decoded):
+                    if isinstance(audio, BaseException):
+                        errors[i] = str(audio)
+                    else:
+                        audio_indices.append(i)
+                        audios.append(audio)
+
+                outputs = await get_analysis_pipeline().run_batch(audios)
+
+            async with SessionLocal() as db:
+                for i, output in zip(audio_indices, outputs):
+                    if isinstance(output, Exception):
+                        errors[i] = str(output)
+                        continue
+                    # Fuse all results against the in-memory matrix
+                    fusion_result = await FusionService.get_final_mood(
+                        db=db,
+                        audio_emotion=output["audio_emotion"],
+                        text_emotion=output["text_emotion"]
+                    )
+                    results[i] = build_mood_result(output, fusion_result)
+
+                await get_analysis_writer().save(db, [results[i] for i in sorted(results)])
+
+        batch_items = []
+        for i, item in enumerate(items):
+            if i in results:
+                result = results[i]
+                if not include_timeline:
+                    result = {**result, "audio_timeline": None, "transcript_segments": None}
+                batch_items.append(BatchItemResult(filename=item.filename, result=MoodAnalysisResponse(**result)))
+            else:
+                batch_items.append(BatchItemResult(filename=item.filename, error=errors.get(i, "Analysis failed")))
+
+        return BatchAnalysisResponse(
+            items=batch_items,
+            succeeded=len(results),
+            failed=len(items) - len(results)
+        )
 
-        # Validate file extension
-        file_ext = Path(file.filename).suffix.lower()
-        if file_ext not in settings.ALLOWED_AUDIO_FORMATS:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file format. Allowed formats: {', '.join(settings.ALLOWED_AUDIO_FORMATS)}"
-            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
 
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as temp_file:
-            for chunk in temp_data:
-                temp_file.write(chunk)
-            temp_file_path = temp_file.name
-
-        # Step 1: Transcribe audio using local faster-whisper
-        start_time = time.time()
-        print("[INFO] Transcribing audio using local faster-whisper (tiny model)...")
-        whisper_service = get_whisper_service()
-        text = await whisper_service.transcribe_audio(temp_file_path)
-        whisper_time = time.time() - start_time
-        print(f"[TIMING] Whisper transcription took: {whisper_time:.2f}s")
-
-        if not text:
-            raise HTTPException(
-                status_code=400,
-                detail="No speech detected in audio file"
-            )
 
-        # Step 2: Detect emotion from audio (skip for long recordings to save time)
-        start_time = time.time()
-
-        # Check audio duration using torchaudio
-        import torchaudio
-        waveform, sample_rate = torchaudio.load(temp_file_path)
-        duration_seconds = waveform.shape[1] / sample_rate
-
-        # Skip audio emotion for recordings longer than 15 seconds (saves ~15-20s)
-        if duration_seconds > 15:
-            print(f"[INFO] Audio duration: {duration_seconds:.1f}s - Skipping audio emotion detection (too slow for long recordings)")
-            audio_emotion = "neutral"  # Default to neutral for fusion matrix
-            audio_confidence = 0.0
-            audio_time = time.time() - start_time
-            print(f"[TIMING] Audio emotion detection skipped (duration > 10s)")
-        else:
-            print(f"[INFO] Audio duration: {duration_seconds:.1f}s - Running audio emotion detection")
-            audio_emotion_service = get_audio_emotion_service()
-            audio_emotion, audio_confidence = await audio_emotion_service.detect_emotion(temp_file_path)
-            audio_time = time.time() - start_time
-            print(f"[TIMING] Audio emotion detection took: {audio_time:.2f}s")
-
-        # Step 3: Detect emotion from transcribed text
-        start_time = time.time()
-        text_emotion_service = get_text_emotion_service()
-        text_emotion, text_confidence = await text_emotion_service.detect_emotion(text)
-        text_time = time.time() - start_time
-        print(f"[TIMING] Text emotion detection took: {text_time:.2f}s")
-
-        # Step 4: Fuse emotions using fusion matrix
-        fusion_result = FusionService.get_final_mood(
-            db=db,
-            audio_emotion=audio_emotion,
-            text_emotion=text_emotion
+@app.post("/api/jobs", response_model=JobResponse, status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    callback_url: Optional[str] = Form(None)
+):
+    """
+    Queue an audio file for analysis and return a job id immediately.
+
+    Poll GET /api/jobs/{job_id} for the result, or pass callback_url to have
+    the finished job POSTed to you.
+
+    Args:
+        file: Audio file to analyze
+        callback_url: Optional URL notified when the job finishes (its host
+                      must be in JOB_CALLBACK_ALLOWED_HOSTS)
+    """
+    if callback_url and not callback_allowed(callback_url):
+        raise HTTPException(
+            status_code=400,
+            detail="callback_url must be an http(s) URL on a host in JOB_CALLBACK_ALLOWED_HOSTS"
         )
 
-        # Step 5: Save to database
-        analysis = VoiceAnalysis(
-            transcribed_text=text,
-            audio_emotion=audio_emotion,
-            audio_confidence=audio_confidence,
-            text_emotion=text_emotion,
-            text_confidence=text_confidence,
-            final_mood=fusion_result["final_mood"],
-            emoji=fusion_result["emoji"],
-            description=fusion_result["description"]
+    # A job could never run while the models are loading or failed to load
+    get_model_loader().require_ready()
+    upload = await ingest_upload(file)
+
+    try:
+        job = await get_job_queue().submit(upload.file, upload.format, callback_url)
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(settings.INFERENCE_RETRY_AFTER)}
         )
 
-        db.add(analysis)
-        db.commit()
-        db.refresh(analysis)
+    return JobQueue.public_view(job)
 
-        # Step 6: Return response
-        return MoodAnalysisResponse(
-            transcribed_text=text,
-            audio_emotion=audio_emotion,
-            audio_confidence=audio_confidence,
-            text_emotion=text_emotion,
-            text_confidence=text_confidence,
-            final_mood=fusion_result["final_mood"],
-            emoji=fusion_result["emoji"],
-            description=fusion_result["description"]
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Get the status (and, once finished, the result) of an analysis job."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobQueue.public_view(job)
+
+
+@app.get("/api/profiles/{profile_id}", dependencies=[Depends(require_profiling_token)])
+async def get_profile(profile_id: str, format: str = "json"):
+    """
+    Get the profile of a request made with X-Profile-Token.
+
+    Requires an allow-listed profiling token, like the profiled request.
+
+    Args:
+        profile_id: X-Profile-Id header of the profiled response
+        format: "json" for a summary (stages, top functions, torch operators)
+                or "pstats" to download the full cProfile data (.prof)
+    """
+    profile = get_profile_store().get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "pstats":
+        return Response(
+            content=profile.pstats_bytes(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
         )
+    return profile.report()
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@app.websocket("/ws/analyze")
+async def analyze_stream(websocket: WebSocket):
+    """
+    Analyze audio while it is being recorded.
+
+    Protocol:
+    1. Client sends {"type": "start", "format": "pcm16"|"float32"|"webm"|"ogg", "sample_rate": N}
+    2. Client sends audio as binary frames
+    3. Server sends {"type": "partial", "result": {...}} every STREAM_STEP_SECONDS of audio
+    4. Client sends {"type": "stop"}; server sends {"type": "final", "result": MoodAnalysisResponse}
+
+    Errors are sent as {"type": "error", "detail": "..."} before closing.
+    """
+    limiter = get_streaming_session_limiter()
+    await websocket.accept()
+
+    if not get_model_loader().is_ready:
+        await websocket.send_json({"type": "error", "detail": "Models are still loading. Please retry shortly."})
+        await websocket.close(code=1013)
+        return
+
+    if not limiter.acquire():
+        await websocket.send_json({"type": "error", "detail": "Too many streaming sessions. Please retry later."})
+        await websocket.close(code=1013)
+        return
+
+    step_task: Optional[asyncio.Task] = None
+
+    async def send_partial(session: StreamingAnalysisSession):
+        try:
+            # Partials share the inference slots with /api/analyze
+            async with get_admission_controller().admit():
+                partial = await session.step()
+        except AdmissionRejected:
+            # Busy: skip this partial; the next step covers the audio it would have
+            return
+        if partial["transcribed_text"]:
+            # Provisional fused mood from the in-memory matrix (not saved)
+            async with SessionLocal() as db:
+                partial.update(await FusionService.get_final_mood(
+                    db=db,
+                    audio_emotion=partial["audio_emotion"],
+                    text_emotion=partial["text_emotion"]
+                ))
+        await websocket.send_json({"type": "partial", "result": partial})
+
+    try:
+        start = await websocket.receive_json()
+        if start.get("type") != "start":
+            raise ValueError("First message must be {\"type\": \"start\", ...}")
+        sample_rate = start.get("sample_rate", 16000)
+        # Some JSON encoders send 16000.0; the session rejects anything else that is not a positive int
+        if isinstance(sample_rate, float) and sample_rate.is_integer():
+            sample_rate = int(sample_rate)
+        session = StreamingAnalysisSession(format=start.get("format", "pcm16"), sample_rate=sample_rate)
+
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+            if message.get("bytes") is not None:
+                session.add_frame(message["bytes"])
+                if session.is_full():
+                    break
+                # One step at a time; frames keep buffering while it runs
+                if (step_task is None or step_task.done()) and session.ready_for_step():
+                    if step_task is not None:
+                        step_task.result()
+                    step_task = asyncio.create_task(send_partial(session))
+            elif message.get("text") is not None:
+                if json.loads(message["text"]).get("type") == "stop":
+                    break
+
+        if step_task is not None:
+            await step_task
+            step_task = None
+
+        async with get_admission_controller().admit():
+            result = await session.step(final=True)
+        analysis_result = await get_analysis_pipeline().finalize(result)
+        await websocket.send_json({
+            "type": "final",
+            "result": MoodAnalysisResponse(**analysis_result).model_dump()
+        })
+        await websocket.close()
+
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        if isinstance(e, AdmissionRejected):
+            detail = e.detail
+        elif isinstance(e, (ValueError, NoSpeechDetected)):
+            detail = str(e)
+        else:
+            detail = f"Analysis failed: {str(e)}"
+        try:
+            await websocket.send_json({"type": "error", "detail": detail})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
     finally:
-        # Clean up temporary file
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-            except Exception:
-                pass
+        if step_task is not None and not step_task.done():
+            step_task.cancel()
+        limiter.release()
 
 
 @app.get("/api/history", response_model=List[AnalysisHistoryResponse])
 async def get_history(
-    limit: int = 50,
-    db: Session = Depends(get_db)
+    limit: int = Query(settings.HISTORY_DEFAULT_LIMIT, ge=1, le=settings.HISTORY_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    mood: Optional[List[str]] = Query(None),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get analysis history (most recent first), one page at a time.
+
+    The X-Next-Cursor response header holds the cursor for the next page
+    (absent on the last page).
+
+    Args:
+        limit: Page size (at most HISTORY_MAX_LIMIT)
+        cursor: X-Next-Cursor of the previous page
+        mood: Only these final moods (repeatable)
+        since: Only analyses created at or after this time (ISO 8601)
+        until: Only analyses created before this time (ISO 8601)
+        fields: Comma-separated columns to return, e.g. "final_mood,emoji"
+                (id and created_at are always included; default: all)
+    """
+    selected = None
+    if fields:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in selected if field not in HISTORY_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(HISTORY_FIELDS)}"
+            )
+
+    try:
+        rows, next_cursor = await query_history(
+            db, limit=limit, cursor=cursor, moods=mood, since=since, until=until, fields=selected
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Rows are plain dicts from the selected columns; skip model validation
+    # and serialize them directly with orjson
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return ORJSONResponse(content=rows, headers=headers)
+
+
+@app.get("/api/stats", response_model=MoodStatsResponse)
+async def get_stats(
+    granularity: str = "hour",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get analysis history (most recent first)."""
-    analyses = db.query(VoiceAnalysis)\
-        .order_by(VoiceAnalysis.created_at.desc())\
-        .limit(limit)\
-        .all()
+    """
+    Get mood distributions and a time series over a time range.
+
+    Served from the hourly/daily mood_stats rollup, so a request costs the
+    same however large the analysis history is.
+
+    Args:
+        granularity: "hour" or "day"
+        since: Start of the range (ISO 8601; default: STATS_DEFAULT_HOURS
+               or STATS_DEFAULT_DAYS before until)
+        until: End of the range, exclusive (ISO 8601; default: now)
+    """
+    if granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown granularity: {granularity}. Available: {', '.join(GRANULARITIES)}"
+        )
+    # Naive timestamps are taken as UTC (buckets are UTC hours and days)
+    until = until or datetime.now(timezone.utc)
+    until = until if until.tzinfo else until.replace(tzinfo=timezone.utc)
+    if since is None:
+        if granularity == "hour":
+            since = until - timedelta(hours=settings.STATS_DEFAULT_HOURS)
+        else:
+            since = until - timedelta(days=settings.STATS_DEFAULT_DAYS)
+    since = since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    if (until - since) / GRANULARITIES[granularity] > settings.STATS_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range spans more than {settings.STATS_MAX_BUCKETS} {granularity} buckets"
+        )
 
-    return analyses
+    return await query_mood_stats(db, granularity, since, until)
 
 
 @app.get("/api/matrix", response_model=List[FusionMatrixResponse])
-async def get_fusion_matrix(db: Session = Depends(get_db)):
-    """Get all fusion matrix entries."""
-    entries = FusionService.get_all_matrix_entries(db)
-    return entries
+async def get_fusion_matrix(request: Request, db: AsyncSession = Depends(get_db)):
+    """Get all fusion matrix entries (cached; supports If-None-Match)."""
+    entries, etag = await FusionService.get_matrix_snapshot(db)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in candidates or etag in candidates:
+            return Response(status_code=304, headers=headers)
+
+    return JSONResponse(content=entries, headers=headers)
 
 
 if __name__ == "__main__":
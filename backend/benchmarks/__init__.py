@@ -0,0 +1,7 @@
+"""
+Offline latency benchmarks for the analysis pipeline.
+
+Run from the backend directory:
+
+    python -m benchmarks --output results.json --baseline baseline.json
+"""
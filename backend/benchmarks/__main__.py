@@ -0,0 +1,77 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from benchmarks.fixtures import DEFAULT_FIXTURES, FIXTURES, resolve_fixtures
+from benchmarks.report import compare, print_comparison, print_results
+from benchmarks.runner import STAGES, BenchmarkRunner
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark each analysis stage and /api/analyze on synthetic audio."
+    )
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        help=f"Comma-separated stages to run (default: all of {','.join(STAGES)})")
+    parser.add_argument("--fixtures", default=",".join(DEFAULT_FIXTURES),
+                        help=f"Comma-separated audio fixtures (available: {','.join(FIXTURES)})")
+    parser.add_argument("--iterations", type=int, default=5, help="Timed iterations per stage and fixture")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed iterations run first")
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"),
+                        help="Where to write the results JSON")
+    parser.add_argument("--baseline", type=Path, help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed p50/p95 slowdown against the baseline (0.2 = 20%%)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Write this run to --baseline instead of comparing")
+    parser.add_argument("--verbose", action="store_true", help="Show the services' log output")
+    return parser.parse_args()
+
+
+def main() -> int:
+    """Run the benchmarks; exit status 1 if a stage regressed against the baseline."""
+    args = parse_args()
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        print(f"[ERROR] Unknown stages: {', '.join(unknown)} (available: {', '.join(STAGES)})")
+        return 2
+    try:
+        specs = resolve_fixtures([name.strip() for name in args.fixtures.split(",") if name.strip()])
+    except ValueError as e:
+        print(f"[ERROR] {str(e)}")
+        return 2
+    if args.iterations < 1:
+        print("[ERROR] --iterations must be at least 1")
+        return 2
+
+    results = BenchmarkRunner(iterations=args.iterations, warmup=args.warmup, verbose=args.verbose).run(stages, specs)
+
+    args.output.write_text(json.dumps(results, indent=2))
+    print_results(results)
+    print(f"[INFO] Results written to {args.output}")
+
+    if args.baseline is None:
+        return 0
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"[INFO] Baseline updated: {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"[WARN] Baseline {args.baseline} not found; run with --update-baseline to create it")
+        return 0
+
+    rows = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+    print_comparison(rows, args.tolerance)
+    regressions = [row for row in rows if row["regressed"]]
+    if regressions:
+        print(f"[ERROR] {len(regressions)} benchmark regression(s) beyond {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
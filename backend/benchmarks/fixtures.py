@@ -0,0 +1,159 @@
+import io
+import wave
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class FixtureSpec:
+    """A synthetic recording to benchmark with.
+
+    Attributes:
+        name: Fixture id used in reports and baselines
+        duration_seconds: Length of the recording
+        sample_rate: Sample rate of the encoded file
+        channels: 1 (mono) or 2 (stereo)
+        format: Container written: "wav", "flac" or "ogg"
+    """
+    name: str
+    duration_seconds: float
+    sample_rate: int
+    channels: int
+    format: str
+
+    @property
+    def filename(self) -> str:
+        """Upload filename (the extension selects the decoder)."""
+        return f"{self.name}.{self.format}"
+
+
+# Covers the shapes uploads take: short browser clips, phone-rate audio,
+# stereo desktop recordings, and long recordings that are transcribed in chunks
+FIXTURES: Dict[str, FixtureSpec] = {
+    spec.name: spec for spec in (
+        FixtureSpec("short_16k_mono_wav", 3.0, 16000, 1, "wav"),
+        FixtureSpec("phone_8k_mono_wav", 8.0, 8000, 1, "wav"),
+        FixtureSpec("medium_44k_stereo_flac", 15.0, 44100, 2, "flac"),
+        FixtureSpec("medium_48k_mono_ogg", 20.0, 48000, 1, "ogg"),
+        FixtureSpec("long_48k_stereo_wav", 75.0, 48000, 2, "wav"),
+    )
+}
+
+# Used when --fixtures is not given (keeps a default run to a few minutes)
+DEFAULT_FIXTURES = ["short_16k_mono_wav", "phone_8k_mono_wav", "medium_44k_stereo_flac", "long_48k_stereo_wav"]
+
+
+def synthesize(spec: FixtureSpec, variant: int = 0) -> np.ndarray:
+    """
+    Synthesize a deterministic speech-like signal.
+
+    Voiced "words" (harmonics of a gliding pitch, 0.2-0.7s long) alternate
+    with short gaps, with a longer pause every few words, over a quiet noise
+    floor - enough structure for VAD to find spans and for the models to do
+    their full amount of work. The same spec and variant always produce the
+    same samples; different variants differ only in the noise floor, which
+    keeps uploads distinct for the result cache.
+
+    Args:
+        spec: Fixture to synthesize
+        variant: Per-iteration variant number
+
+    Returns:
+        float32 samples, shape (num_samples, channels)
+    """
+    rate = spec.sample_rate
+    rng = np.random.default_rng(zlib.crc32(spec.name.encode()))
+    num_samples = int(spec.duration_seconds * rate)
+    signal = np.zeros(num_samples, dtype=np.float64)
+
+    position = int(0.3 * rate)
+    word = 0
+    while position < num_samples:
+        length = min(int(rng.uniform(0.2, 0.7) * rate), num_samples - position)
+        t = np.arange(length) / rate
+        pitch = rng.uniform(100, 220) * (1 + 0.15 * np.sin(2 * np.pi * rng.uniform(2, 5) * t))
+        phase = 2 * np.pi * np.cumsum(pitch) / rate
+        voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+        envelope = np.sin(np.pi * np.arange(length) / max(length, 1)) ** 0.5
+        signal[position:position + length] = 0.25 * voiced * envelope
+
+        word += 1
+        pause = rng.uniform(0.6, 1.2) if word % 5 == 0 else rng.uniform(0.05, 0.2)
+        position += length + int(pause * rate)
+
+    noise = np.random.default_rng(variant).normal(0.0, 0.001, num_samples)
+    mono = signal + noise
+
+    if spec.channels == 1:
+        return mono.astype(np.float32)[:, None]
+    # Slightly different gain and a 1ms delay on the second channel
+    delay = int(0.001 * rate)
+    right = np.concatenate([np.zeros(delay), mono[:-delay] if delay else mono]) * 0.8
+    return np.stack([mono, right], axis=1).astype(np.float32)
+
+
+def encode(spec: FixtureSpec, samples: np.ndarray) -> bytes:
+    """
+    Encode samples into the fixture's container format.
+
+    Args:
+        spec: Fixture (sample rate and format)
+        samples: float32 samples, shape (num_samples, channels)
+
+    Returns:
+        Encoded file bytes
+
+    Raises:
+        Exception: If the format needs soundfile and it is not installed
+    """
+    buffer = io.BytesIO()
+    if spec.format == "wav":
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(spec.channels)
+            wav.setsampwidth(2)
+            wav.setframerate(spec.sample_rate)
+            wav.writeframes(pcm.tobytes())
+    else:
+        import soundfile
+
+        subtype = "VORBIS" if spec.format == "ogg" else "PCM_16"
+        soundfile.write(buffer, samples, spec.sample_rate, format=spec.format.upper(), subtype=subtype)
+    return buffer.getvalue()
+
+
+def build_fixture(spec: FixtureSpec, variant: int = 0) -> bytes:
+    """Synthesize and encode one fixture variant."""
+    return encode(spec, synthesize(spec, variant))
+
+
+def resolve_fixtures(names: List[str]) -> List[FixtureSpec]:
+    """
+    Look up fixture specs by name.
+
+    Raises:
+        ValueError: If a name is unknown
+    """
+    unknown = [name for name in names if name not in FIXTURES]
+    if unknown:
+        raise ValueError(f"Unknown fixtures: {', '.join(unknown)} (available: {', '.join(FIXTURES)})")
+    return [FIXTURES[name] for name in names]
+
+
+# Inputs for the text emotion benchmark: a typical short transcript and a
+# long one (about what a minute of speech transcribes to)
+TEXT_FIXTURES: Dict[str, str] = {
+    "sentence": "I finally got the results back today and honestly I could not be happier with how it went.",
+    "paragraph": (
+        "So I have been thinking about the last few weeks and it has been a lot. Work picked up right "
+        "after the holidays, and we had two deadlines land in the same week, which meant late nights "
+        "and not much sleep. I was frustrated at first because nobody seemed to plan for it, but the "
+        "team pulled together and we shipped both on time. My manager called me this morning to say "
+        "thanks, which I did not expect. I am tired, but I feel proud of what we did, and a little "
+        "relieved that the next month looks calmer. I think I will take a long weekend and go see my "
+        "family up north, walk the dog by the lake, and just not look at my phone for a couple of days."
+    ),
+}
@@ -0,0 +1,123 @@
+import os
+import platform
+import resource
+import sys
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Statistics compared against the baseline
+COMPARED_STATS = ("p50_ms", "p95_ms")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(durations: List[float], audio_seconds: float = 0.0) -> Dict[str, Any]:
+    """
+    Summarize the latencies of one stage on one fixture.
+
+    Args:
+        durations: Wall-clock seconds of each measured iteration
+        audio_seconds: Duration of the fixture (0 for stages without audio)
+
+    Returns:
+        Dictionary with iterations, mean/min/max/p50/p95/p99 in ms,
+        throughput (calls per second) and, for audio stages, the real-time
+        factor (seconds of audio processed per second)
+    """
+    values = np.asarray(durations, dtype=np.float64)
+    total = float(values.sum())
+    summary = {
+        "iterations": len(values),
+        "mean_ms": round(float(values.mean()) * 1000, 3),
+        "min_ms": round(float(values.min()) * 1000, 3),
+        "max_ms": round(float(values.max()) * 1000, 3),
+        "p50_ms": round(float(np.percentile(values, 50)) * 1000, 3),
+        "p95_ms": round(float(np.percentile(values, 95)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(values, 99)) * 1000, 3),
+        "throughput_per_second": round(len(values) / total, 3) if total > 0 else None,
+    }
+    if audio_seconds:
+        summary["realtime_factor"] = round(audio_seconds * len(values) / total, 2) if total > 0 else None
+    return summary
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine (results are only comparable on similar hardware)."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Compare a run against a stored baseline.
+
+    Only stage/fixture pairs present in both runs are compared; a stat
+    regresses when it is more than `tolerance` (a fraction, 0.2 = 20%)
+    slower than the baseline.
+
+    Args:
+        current: Results of this run
+        baseline: Results of the baseline run
+        tolerance: Allowed slowdown as a fraction of the baseline
+
+    Returns:
+        One row per compared stat with stage, fixture, stat, baseline,
+        current, change (fraction) and regressed
+    """
+    rows = []
+    for stage, fixtures in current["stages"].items():
+        for fixture, summary in fixtures.items():
+            reference = baseline.get("stages", {}).get(stage, {}).get(fixture)
+            if not reference:
+                continue
+            for stat in COMPARED_STATS:
+                before, after = reference.get(stat), summary.get(stat)
+                if not before or after is None:
+                    continue
+                change = (after - before) / before
+                rows.append({
+                    "stage": stage,
+                    "fixture": fixture,
+                    "stat": stat,
+                    "baseline": before,
+                    "current": after,
+                    "change": round(change, 4),
+                    "regressed": change > tolerance,
+                })
+    return rows
+
+
+def print_results(results: Dict[str, Any]):
+    """Print a per-stage latency table."""
+    print(f"{'stage':<16} {'fixture':<26} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'per s':>8}")
+    for stage, fixtures in results["stages"].items():
+        for fixture, summary in fixtures.items():
+            print(
+                f"{stage:<16} {fixture:<26} {summary['p50_ms']:>10.1f} {summary['p95_ms']:>10.1f} "
+                f"{summary['p99_ms']:>10.1f} {summary['throughput_per_second'] or 0:>8.2f}"
+            )
+    print(f"Peak RSS: {results['peak_rss_mb']:.1f} MB")
+
+
+def print_comparison(rows: List[Dict[str, Any]], tolerance: float):
+    """Print the baseline comparison, flagging regressions."""
+    if not rows:
+        print("[WARN] Nothing in common with the baseline to compare")
+        return
+    print(f"\nAgainst baseline (tolerance {tolerance:.0%}):")
+    for row in rows:
+        flag = "REGRESSION" if row["regressed"] else "ok"
+        print(
+            f"  {row['stage']:<16} {row['fixture']:<26} {row['stat']:<7} "
+            f"{row['baseline']:>10.1f} -> {row['current']:>10.1f} ({row['change']:+.1%}) {flag}"
+        )
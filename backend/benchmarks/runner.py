@@ -0,0 +1,253 @@
+import asyncio
+import contextlib
+import os
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.fixtures import TEXT_FIXTURES, FixtureSpec, build_fixture
+from benchmarks.report import environment, peak_rss_mb, summarize
+from core.config import get_settings
+from core.database import SessionLocal, engine
+from services.analysis_pipeline import get_analysis_pipeline
+from services.analysis_store import save_analyses
+from services.audio_preprocessing import get_audio_preprocessor
+from services.fusion_service import FusionService
+from services.text_emotion import get_text_emotion_service
+from services.voice_activity import get_voice_activity_detector
+
+
+# Stages in the order they run; "e2e" goes last because it starts the app
+AUDIO_STAGES = ("decode", "vad", "whisper", "wav2vec2")
+STAGES = AUDIO_STAGES + ("distilroberta", "fusion", "db_insert", "e2e")
+
+# Emotion pairs cycled through by the fusion benchmark
+_FUSION_PAIRS = [
+    ("happy", "joy"), ("sad", "sad"), ("angry", "angry"), ("neutral", "neutral"),
+    ("happy", "sad"), ("sad", "happy"), ("fear", "fearful"), ("surprise", "surprised"),
+]
+
+
+class BenchmarkRunner:
+    """
+    Measure each analysis stage on its own, then the whole /api/analyze path.
+
+    Stage inputs (decoded audio, trimmed speech) are prepared outside the
+    timed region, so a stage's numbers only cover that stage. Every stage
+    runs `warmup` untimed iterations first. Model output printed by the
+    services is silenced unless verbose is set.
+    """
+
+    def __init__(self, iterations: int = 5, warmup: int = 1, verbose: bool = False):
+        """
+        Initialize the runner.
+
+        Args:
+            iterations: Timed iterations per stage and fixture
+            warmup: Untimed iterations run first
+            verbose: Keep the services' [INFO]/[TIMING] output
+        """
+        self.iterations = iterations
+        self.warmup = warmup
+        self.verbose = verbose
+        self.loop = asyncio.new_event_loop()
+        self._prepared: Dict[str, Dict[str, Any]] = {}
+
+    @contextlib.contextmanager
+    def _quiet(self):
+        """Silence service logging while measuring (unless verbose)."""
+        if self.verbose:
+            yield
+            return
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+
+    def _measure(self, call: Callable[[], Any]) -> List[float]:
+        """Run call warmup + iterations times; return the timed durations."""
+        with self._quiet():
+            for _ in range(self.warmup):
+                call()
+            durations = []
+            for _ in range(self.iterations):
+                start_time = time.perf_counter()
+                call()
+                durations.append(time.perf_counter() - start_time)
+        return durations
+
+    def _prepare(self, spec: FixtureSpec) -> Dict[str, Any]:
+        """Encode, decode and trim a fixture once (inputs for the audio stages)."""
+        if spec.name not in self._prepared:
+            data = build_fixture(spec)
+            audio = get_audio_preprocessor().decode(data, spec.format)
+            with self._quiet():
+                trimmed = get_voice_activity_detector().trim(audio)
+            self._prepared[spec.name] = {"data": data, "audio": audio, "trimmed": trimmed}
+        return self._prepared[spec.name]
+
+    def bench_decode(self, spec: FixtureSpec) -> List[float]:
+        """Container decode, downmix and resample to 16kHz."""
+        data = self._prepare(spec)["data"]
+        preprocessor = get_audio_preprocessor()
+        return self._measure(lambda: preprocessor.decode(data, spec.format))
+
+    def bench_vad(self, spec: FixtureSpec) -> List[float]:
+        """Voice activity detection and silence trimming."""
+        audio = self._prepare(spec)["audio"]
+        detector = get_voice_activity_detector()
+        return self._measure(lambda: detector.trim(audio))
+
+    def bench_whisper(self, spec: FixtureSpec) -> List[float]:
+        """Transcription as the pipeline runs it (cascade, parallel chunks for long clips)."""
+        trimmed = self._prepare(spec)["trimmed"]
+        pipeline = get_analysis_pipeline()
+        return self._measure(lambda: self.loop.run_until_complete(pipeline._transcribe(trimmed)))
+
+    def bench_wav2vec2(self, spec: FixtureSpec) -> List[float]:
+        """Audio emotion as the pipeline runs it (windowed for long clips)."""
+        trimmed = self._prepare(spec)["trimmed"]
+        pipeline = get_analysis_pipeline()
+        return self._measure(lambda: self.loop.run_until_complete(pipeline._detect_audio_emotion(trimmed.audio)))
+
+    def bench_distilroberta(self, text: str) -> List[float]:
+        """One text emotion forward pass (bypasses the text emotion cache)."""
+        service = get_text_emotion_service()
+        return self._measure(lambda: service.predict_batch([text]))
+
+    def bench_fusion(self) -> List[float]:
+        """Fusion matrix lookups against the in-memory matrix."""
+        pairs = iter(_FUSION_PAIRS * (self.warmup + self.iterations))
+        run = self.loop.run_until_complete
+        db = SessionLocal()
+        try:
+            return self._measure(lambda: run(FusionService.get_final_mood(db, *next(pairs))))
+        finally:
+            run(db.close())
+
+    def bench_db_insert(self) -> List[float]:
+        """
+        Insert and commit one analysis row.
+
+        Runs inside an outer transaction that is rolled back at the end; each
+        commit only releases a savepoint, so nothing is left in the table.
+        """
+        row = {
+            "transcribed_text": TEXT_FIXTURES["sentence"],
+            "asr_model": "tiny",
+            "audio_emotion": "happy",
+            "audio_confidence": 0.9,
+            "text_emotion": "joy",
+            "text_confidence": 0.95,
+            "final_mood": "Happy",
+            "emoji": "😊",
+            "description": "Benchmark row (rolled back).",
+        }
+        run = self.loop.run_until_complete
+        connection = run(engine.connect())
+        transaction = run(connection.begin())
+        db = AsyncSession(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            return self._measure(lambda: run(save_analyses(db, [row])))
+        finally:
+            run(db.close())
+            run(transaction.rollback())
+            run(connection.close())
+
+    async def _bench_e2e(self, specs: List[FixtureSpec]) -> Dict[str, Dict[str, Any]]:
+        """POST each fixture to /api/analyze through an in-process ASGI client."""
+        import httpx
+        from app import app
+        from services.model_loader import get_model_loader
+
+        await app.router.startup()
+        try:
+            loader = get_model_loader()
+            while loader.status == "loading":
+                await asyncio.sleep(0.5)
+            if loader.status == "failed":
+                raise RuntimeError(f"Models failed to load: {loader.stats()['models']}")
+
+            results = {}
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+                for spec in specs:
+                    statuses = Counter()
+                    durations = []
+                    # A new variant per request so the result cache never answers
+                    with self._quiet():
+                        for variant in range(1, self.warmup + self.iterations + 1):
+                            data = build_fixture(spec, variant)
+                            start_time = time.perf_counter()
+                            response = await client.post(
+                                "/api/analyze",
+                                files={"file": (spec.filename, data, f"audio/{spec.format}")}
+                            )
+                            elapsed = time.perf_counter() - start_time
+                            if variant > self.warmup:
+                                durations.append(elapsed)
+                                statuses[str(response.status_code)] += 1
+
+                    results[spec.name] = {
+                        **summarize(durations, spec.duration_seconds),
+                        "status_codes": dict(statuses),
+                        "peak_rss_mb": peak_rss_mb(),
+                    }
+                    if set(statuses) != {"200"}:
+                        # Synthetic audio can transcribe to nothing (400: no speech);
+                        # the timing still covers decode, VAD and every model
+                        print(f"[WARN] e2e {spec.name}: responses {dict(statuses)}")
+            return results
+        finally:
+            await app.router.shutdown()
+
+    def run(self, stages: List[str], specs: List[FixtureSpec]) -> Dict[str, Any]:
+        """
+        Run the selected stages on the selected fixtures.
+
+        Args:
+            stages: Stage names from STAGES
+            specs: Audio fixtures for the audio and e2e stages
+
+        Returns:
+            Results dictionary: created_at, environment, config, stages
+            (stage -> fixture -> summary) and overall peak_rss_mb
+        """
+        settings = get_settings()
+        results: Dict[str, Any] = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "environment": environment(),
+            "config": {
+                "iterations": self.iterations,
+                "warmup": self.warmup,
+                "fixtures": [spec.name for spec in specs],
+                "model_fingerprint": get_analysis_pipeline().model_fingerprint(),
+                "inference_backend": settings.INFERENCE_BACKEND,
+                "asr_workers": settings.ASR_WORKERS,
+            },
+            "stages": {},
+        }
+
+        for stage in (stage for stage in STAGES if stage in stages):
+            print(f"[INFO] Benchmarking {stage}...")
+            if stage in AUDIO_STAGES:
+                measure = getattr(self, f"bench_{stage}")
+                results["stages"][stage] = {
+                    spec.name: {**summarize(measure(spec), spec.duration_seconds), "peak_rss_mb": peak_rss_mb()}
+                    for spec in specs
+                }
+            elif stage == "distilroberta":
+                results["stages"][stage] = {
+                    name: {**summarize(self.bench_distilroberta(text)), "peak_rss_mb": peak_rss_mb()}
+                    for name, text in TEXT_FIXTURES.items()
+                }
+            elif stage == "fusion":
+                results["stages"][stage] = {"lookup": {**summarize(self.bench_fusion()), "peak_rss_mb": peak_rss_mb()}}
+            elif stage == "db_insert":
+                results["stages"][stage] = {"single_row": {**summarize(self.bench_db_insert()), "peak_rss_mb": peak_rss_mb()}}
+            elif stage == "e2e":
+                results["stages"][stage] = self.loop.run_until_complete(self._bench_e2e(specs))
+
+        results["peak_rss_mb"] = peak_rss_mb()
+        return results
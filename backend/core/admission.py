@@ -0,0 +1,174 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict
+
+from fastapi import HTTPException
+
+from core.config import get_settings
+
+
+class AdmissionRejected(HTTPException):
+    """Raised when the inference queue is full or the wait timed out (HTTP 503)."""
+
+    def __init__(self, detail: str, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class AdmissionController:
+    """
+    Bounded admission queue in front of the model services.
+
+    At most `max_concurrency` requests run inference at once; up to
+    `max_queue` more wait in FIFO order. Anything beyond that is rejected
+    immediately, and waiters give up after `queue_timeout` seconds, so under
+    overload clients get a fast 503 with Retry-After instead of every request
+    slowing down together. Background work (queued jobs) takes slots from the
+    same pool but waits as long as it has to, without counting against
+    `max_queue`.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: int
+    ):
+        """Initialize the controller with its limits."""
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._background_waiting = 0
+
+        # Counters exposed through stats()
+        self._admitted_total = 0
+        self._rejected_total = 0
+        self._timed_out_total = 0
+        self._wait_seconds_total = 0.0
+        self._max_wait_seconds = 0.0
+        self._last_wait_seconds = 0.0
+
+    def _record_wait(self, wait_seconds: float):
+        """Record how long an admitted request waited in the queue."""
+        self._admitted_total += 1
+        self._wait_seconds_total += wait_seconds
+        self._last_wait_seconds = wait_seconds
+        self._max_wait_seconds = max(self._max_wait_seconds, wait_seconds)
+
+    async def _acquire(self, background: bool = False):
+        """Take an inference slot, waiting in the queue if necessary."""
+        if self._in_flight < self.max_concurrency and not self._waiters:
+            self._in_flight += 1
+            self._record_wait(0.0)
+            return
+
+        if not background and len(self._waiters) - self._background_waiting >= self.max_queue:
+            self._rejected_total += 1
+            raise AdmissionRejected(
+                detail="Server is busy: inference queue is full. Please retry later.",
+                retry_after=self.retry_after
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start_time = time.monotonic()
+        if background:
+            self._background_waiting += 1
+
+        try:
+            await asyncio.wait_for(waiter, timeout=None if background else self.queue_timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up; pass it on
+                self._release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+            if isinstance(e, asyncio.TimeoutError):
+                self._timed_out_total += 1
+                raise AdmissionRejected(
+                    detail="Server is busy: timed out waiting for an inference slot. Please retry later.",
+                    retry_after=self.retry_after
+                )
+            raise
+        finally:
+            if background:
+                self._background_waiting -= 1
+
+        # The releasing request transferred its slot to us (in_flight unchanged)
+        self._record_wait(time.monotonic() - start_time)
+
+    def _release(self):
+        """Give the slot to the next live waiter, or free it."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self, background: bool = False) -> AsyncIterator[None]:
+        """
+        Hold an inference slot for the duration of the block.
+
+        Args:
+            background: Wait for a slot however long it takes instead of
+                        being rejected (for work no client is waiting on)
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait timed out
+                               (never for background work)
+        """
+        await self._acquire(background)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get current queue depth, wait times and admission counters."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "background_waiting": self._background_waiting,
+            "admitted_total": self._admitted_total,
+            "rejected_total": self._rejected_total,
+            "timed_out_total": self._timed_out_total,
+            "avg_wait_seconds": self._wait_seconds_total / self._admitted_total if self._admitted_total else 0.0,
+            "max_wait_seconds": self._max_wait_seconds,
+            "last_wait_seconds": self._last_wait_seconds,
+        }
+
+
+# Global instance
+_admission_controller = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get or create admission controller singleton."""
+    global _admission_controller
+    if _admission_controller is None:
+        settings = get_settings()
+        _admission_controller = AdmissionController(
+            max_concurrency=settings.INFERENCE_MAX_CONCURRENCY,
+            max_queue=settings.INFERENCE_MAX_QUEUE,
+            queue_timeout=settings.INFERENCE_QUEUE_TIMEOUT,
+            retry_after=settings.INFERENCE_RETRY_AFTER
+        )
+    return _admission_controller
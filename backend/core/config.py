@@ -2,6 +2,7 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 from pathlib import Path
 import os
+import tempfile
 
 
 # Find .env file - check current dir, parent dir, and project root
@@ -29,6 +30,13 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "mito_books"
     POSTGRES_USER: str = "postgres"
     POSTGRES_PASSWORD: str = "changeme123"
+    DATABASE_URL: str = ""  # Overrides the POSTGRES_* settings, e.g. sqlite:///./voicemood.db
+
+    # Async connection pool (per worker process)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20  # Extra connections opened under load, closed when returned
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Reconnect connections older than this (seconds)
 
     # Application
     BACKEND_PORT: int = 8000
@@ -38,12 +46,128 @@ class Settings(BaseSettings):
     # Upload settings
     MAX_UPLOAD_SIZE: int = 25 * 1024 * 1024  # 25MB
     ALLOWED_AUDIO_FORMATS: list = [".wav", ".mp3", ".m4a", ".ogg", ".flac", ".webm"]
+    ALLOWED_AUDIO_CONTENT_TYPES: list = ["audio/", "video/webm", "video/ogg", "video/mp4", "application/octet-stream"]
+    UPLOAD_SPOOL_MAX_MEMORY: int = 2 * 1024 * 1024  # Larger uploads spill to a temp file
+
+    # Batch analysis (/api/analyze/batch)
+    BATCH_MAX_FILES: int = 32
+    BATCH_MAX_TOTAL_SIZE: int = 100 * 1024 * 1024  # 100MB across all clips
+
+    # Asynchronous analysis jobs (/api/jobs)
+    JOB_WORKERS: int = 1  # Background analyses running at the same time
+    JOB_QUEUE_MAX_SIZE: int = 100  # Queued jobs before POST /api/jobs returns 503
+    JOB_RESULT_TTL_SECONDS: float = 3600.0  # How long finished jobs can be polled
+    JOB_STORAGE_DIR: str = str(Path(tempfile.gettempdir()) / "voicemood_jobs")
+    JOB_CALLBACK_ALLOWED_HOSTS: list = []  # Hosts callback_url may point to; empty disables callbacks
+
+    # Streaming analysis (/ws/analyze)
+    STREAM_MAX_SESSIONS: int = 4  # Concurrent streaming sessions
+    STREAM_MAX_SECONDS: float = 300.0  # Longest recording a session accepts
+    STREAM_STEP_SECONDS: float = 2.0  # New audio needed before the next partial result
+    STREAM_COMMIT_MARGIN_SECONDS: float = 1.0  # Segments ending this close to the tail stay provisional
+    STREAM_FORCE_COMMIT_SECONDS: float = 25.0  # Commit early if no pause within this much audio
+
+    # Inference admission control
+    INFERENCE_MAX_CONCURRENCY: int = 2  # Analyses running models at the same time
+    INFERENCE_MAX_QUEUE: int = 8  # Analyses allowed to wait for a slot
+    INFERENCE_QUEUE_TIMEOUT: float = 30.0  # Seconds to wait before giving up
+    INFERENCE_RETRY_AFTER: int = 5  # Retry-After seconds sent with 503s
+
+    # Micro-batching for text emotion
+    TEXT_BATCH_MAX_SIZE: int = 16  # Dispatch once this many texts are waiting
+    TEXT_BATCH_WAIT_MS: float = 10.0  # Longest a text waits for a batch to fill
+
+    # Memoized text emotion keyed on the normalized transcript
+    TEXT_EMOTION_CACHE_SIZE: int = 4096  # 0 disables
+    TEXT_EMOTION_CACHE_TTL_SECONDS: float = 86400.0
+
+    # ASR cascade: fast model first, larger model only for low-confidence transcripts
+    ASR_FAST_MODEL: str = "tiny"
+    ASR_CASCADE_ENABLED: bool = True
+    ASR_ESCALATION_MODEL: str = "small"
+    ASR_MIN_AVG_LOGPROB: float = -0.8  # Escalate below this duration-weighted avg_logprob
+    ASR_MAX_NO_SPEECH_PROB: float = 0.6  # Escalate if a segment with text is likelier silence than this
+
+    # Long recordings: transcribe pause-delimited chunks in parallel
+    ASR_WORKERS: int = 0  # Parallel transcriptions per Whisper model (0 = half the cores)
+    ASR_LONG_AUDIO_SECONDS: float = 60.0  # Speech longer than this is chunked
+    ASR_CHUNK_SECONDS: float = 30.0  # Longest chunk (Whisper's window)
+
+    # Startup
+    MODEL_WARMUP: bool = True  # Run one inference per model before reporting ready
+
+    # Inference backend for the emotion classifiers
+    INFERENCE_BACKEND: str = "pytorch"  # "pytorch" (fp32 eager) or "onnx" (ONNX Runtime, CPU)
+    ONNX_QUANTIZE: bool = True  # Dynamic int8 quantization of the exported models
+    ONNX_CACHE_DIR: str = str(Path.home() / ".cache" / "voicemood_onnx")
+    ONNX_NUM_THREADS: int = 0  # Intra-op threads per session (0 = one per core)
+    ONNX_PARITY_CHECK: bool = True  # Compare against PyTorch at startup; fall back if they disagree
+    ONNX_PARITY_TOLERANCE: float = 0.05  # Largest allowed confidence difference
+
+    # Voice activity detection (silence trimmed before any model runs)
+    VAD_BACKEND: str = "silero"  # "silero" (bundled with faster-whisper), "energy", or "off"
+    VAD_THRESHOLD: float = 0.5  # Silero speech probability threshold
+    VAD_ENERGY_THRESHOLD_DB: float = -45.0  # Energy VAD: quietest frame level counted as speech
+    VAD_MIN_SPEECH_MS: int = 250  # Shorter bursts are dropped
+    VAD_MIN_SILENCE_MS: int = 500  # Shorter pauses are kept inside a speech span
+    VAD_SPEECH_PAD_MS: int = 200  # Padding kept around each span
+
+    # Length-bucketed batching for audio emotion
+    AUDIO_BATCH_MAX_SIZE: int = 4  # Dispatch once this many clips are waiting
+    AUDIO_BATCH_WAIT_MS: float = 20.0  # Longest a clip waits for a batch to fill
+    AUDIO_BATCH_BUCKET_SECONDS: float = 2.0  # Clips within the same bucket width are batched together
+
+    # Audio emotion for long recordings
+    AUDIO_EMOTION_MAX_FULL_CLIP_SECONDS: float = 15.0  # Longer clips use windowed mode
+    AUDIO_EMOTION_WINDOWED: bool = True  # False skips audio emotion for long clips instead
+    AUDIO_EMOTION_WINDOW_SECONDS: float = 5.0
+    AUDIO_EMOTION_WINDOW_OVERLAP_SECONDS: float = 1.0
+    AUDIO_EMOTION_WINDOW_BATCH_SIZE: int = 8  # Windows per forward pass
+
+    # Fusion matrix cache
+    FUSION_MATRIX_REFRESH_SECONDS: float = 300.0  # Re-read voice_matrix after this long
+    FUSION_MATRIX_PROBE_SECONDS: float = 1.0  # Check voice_matrix for edits at most this often
+
+    # Content-hash result cache for /api/analyze
+    RESULT_CACHE_SIZE: int = 256  # Finished analyses kept in memory (0 disables)
+    RESULT_CACHE_TTL_SECONDS: float = 3600.0
+
+    # /api/history paging
+    HISTORY_DEFAULT_LIMIT: int = 50
+    HISTORY_MAX_LIMIT: int = 200  # Larger limits are rejected (use the cursor to page)
+
+    # Write-behind persistence: analyses are buffered and bulk-inserted in the background
+    WRITE_BEHIND_ENABLED: bool = False  # False commits every analysis before responding
+    WRITE_BEHIND_BATCH_SIZE: int = 100  # Analyses per INSERT; a full batch is flushed at once
+    WRITE_BEHIND_FLUSH_SECONDS: float = 1.0  # Longest an analysis waits in the buffer
+    WRITE_BEHIND_MAX_BUFFER: int = 5000  # When full, requests write their own analyses synchronously
+
+    # /api/stats (served from the mood_stats rollup)
+    STATS_DEFAULT_HOURS: int = 48  # Default range for hourly stats
+    STATS_DEFAULT_DAYS: int = 30  # Default range for daily stats
+    STATS_MAX_BUCKETS: int = 2000  # Larger ranges are rejected (use daily granularity)
+
+    # On-demand per-request profiling (X-Profile-Token header or ?profile=)
+    PROFILING_TOKENS: list = []  # Callers presenting one of these get a profile; empty disables profiling
+    PROFILING_TORCH_OPS: bool = True  # Also record torch operator timings
+    PROFILE_STORE_SIZE: int = 20  # Finished profiles kept for /api/profiles/{id}
+    PROFILE_TTL_SECONDS: float = 3600.0
 
     @property
     def database_url(self) -> str:
-        """Generate PostgreSQL connection URL."""
+        """Generate the (synchronous) database connection URL."""
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def async_database_url(self) -> str:
+        """database_url with its async driver (asyncpg for PostgreSQL, aiosqlite for SQLite)."""
+        scheme, _, rest = self.database_url.partition("://")
+        dialect = scheme.split("+")[0]
+        driver = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}.get(dialect)
+        return f"{dialect}+{driver}://{rest}" if driver else self.database_url
+
     model_config = SettingsConfigDict(
         env_file=find_env_file(),
         case_sensitive=True,
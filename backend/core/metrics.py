@@ -0,0 +1,132 @@
+from typing import Dict, Iterator
+
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import REGISTRY, CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+
+# Seconds; from sub-millisecond lookups to multi-minute transcriptions
+_STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+STAGE_SECONDS = Histogram(
+    "voicemood_stage_duration_seconds",
+    "Time spent in each analysis stage",
+    ["stage"],
+    buckets=_STAGE_BUCKETS
+)
+STAGES_SKIPPED = Counter(
+    "voicemood_stage_skipped_total",
+    "Analysis stages skipped, by reason",
+    ["stage", "reason"]
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "voicemood_http_requests_in_flight",
+    "HTTP requests currently being handled"
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "voicemood_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route"],
+    buckets=_STAGE_BUCKETS
+)
+HTTP_ERRORS = Counter(
+    "voicemood_http_errors_total",
+    "HTTP responses with a 4xx/5xx status, by route",
+    ["method", "route", "status"]
+)
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record the duration of one analysis stage."""
+    STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+
+def count_skipped(stage: str, reason: str):
+    """Record that an analysis stage did not run."""
+    STAGES_SKIPPED.labels(stage=stage, reason=reason).inc()
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """
+    Format stage timings as a Server-Timing header value.
+
+    Args:
+        timings: Stage name -> seconds
+
+    Returns:
+        Header value such as "decode;dur=12.3, whisper;dur=840.1" (milliseconds)
+    """
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+
+
+class ServiceStatsCollector(Collector):
+    """
+    Export the services' existing stats() counters at scrape time.
+
+    Model load state, cache hit/miss counts and admission queue depth are
+    already tracked by their owners for /api/status; reading them on scrape
+    keeps the request path free of extra bookkeeping. Cache and admission
+    metrics are only read once every model is ready, so a scrape never
+    creates (and loads) a model service.
+    """
+
+    def describe(self) -> Iterator[Metric]:
+        # Registering must not call collect(): that would create the services
+        return iter(())
+
+    def collect(self) -> Iterator[Metric]:
+        # Imported here: the services import this module for their own metrics
+        from core.admission import get_admission_controller
+        from services.model_loader import get_model_loader
+        from services.result_cache import get_result_cache
+        from services.text_emotion import get_text_emotion_service
+
+        loader = get_model_loader()
+        state = GaugeMetricFamily(
+            "voicemood_model_state",
+            "Model load state (1 for the current state)",
+            labels=["model", "state"]
+        )
+        load_seconds = GaugeMetricFamily(
+            "voicemood_model_load_seconds",
+            "Seconds a model took to load",
+            labels=["model"]
+        )
+        for name, model in loader.models.items():
+            for candidate in ("pending", "loading", "warming_up", "ready", "failed"):
+                state.add_metric([name, candidate], 1.0 if model["state"] == candidate else 0.0)
+            if model["load_seconds"] is not None:
+                load_seconds.add_metric([name], model["load_seconds"])
+        yield state
+        yield load_seconds
+        yield GaugeMetricFamily("voicemood_models_ready", "Whether every model is ready", value=float(loader.is_ready))
+
+        if not loader.is_ready:
+            return
+
+        hits = CounterMetricFamily("voicemood_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("voicemood_cache_misses", "Cache misses", labels=["cache"])
+        result_stats = get_result_cache().stats()
+        hits.add_metric(["result"], result_stats["hits"])
+        misses.add_metric(["result"], result_stats["misses"])
+        text_stats = get_text_emotion_service().cache.stats()
+        hits.add_metric(["text_emotion"], text_stats["hits"])
+        misses.add_metric(["text_emotion"], text_stats["misses"])
+        yield hits
+        yield misses
+        yield CounterMetricFamily(
+            "voicemood_result_cache_coalesced",
+            "Requests that joined an identical analysis already running",
+            value=result_stats["coalesced"]
+        )
+
+        admission = get_admission_controller().stats()
+        yield GaugeMetricFamily("voicemood_admission_in_flight", "Requests holding an inference slot",
+                                value=admission["in_flight"])
+        yield GaugeMetricFamily("voicemood_admission_queue_depth", "Requests waiting for an inference slot",
+                                value=admission["queue_depth"])
+        yield CounterMetricFamily("voicemood_admission_rejected", "Requests rejected because the queue was full",
+                                  value=admission["rejected_total"])
+
+
+REGISTRY.register(ServiceStatsCollector())
@@ -0,0 +1,269 @@
+import cProfile
+import hmac
+import marshal
+import pstats
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from fastapi import HTTPException, Request
+
+from core.cache import LRUCache
+from core.config import get_settings
+
+
+# Rows kept in a report (the full profile is downloadable as .prof)
+_TOP_FUNCTIONS = 60
+_TOP_TORCH_OPS = 40
+
+# torch.profiler is process-wide: only one profiled call may record operators at a time
+_torch_profiler_lock = threading.Lock()
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+
+class RequestProfile:
+    """
+    Call profile of one request, gathered across the threads it runs on.
+
+    The request's blocking stages (decode, VAD, transcription and model
+    forward passes) run on worker threads; each one is wrapped with
+    profiled() and runs under its own cProfile profiler, and the results
+    are merged. Database calls are awaited on the event loop and are not
+    profiled. Torch operator timings come from
+    torch.profiler; it sees every thread, so operators from requests
+    running at the same time can show up too.
+    """
+
+    def __init__(self, path: str, torch_ops: bool = True):
+        """
+        Initialize an empty profile.
+
+        Args:
+            path: Endpoint being profiled (for the report)
+            torch_ops: Also record torch operator timings
+        """
+        self.id = uuid.uuid4().hex
+        self.path = path
+        self.torch_ops = torch_ops
+        self.created_at = datetime.now(timezone.utc)
+        self.stages: List[Dict[str, Any]] = []
+        self.total_seconds: Optional[float] = None
+        self._stats: Optional[pstats.Stats] = None
+        self._torch_ops: Dict[str, Dict[str, float]] = {}
+        self._torch_skipped = 0
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def activate(self) -> Iterator["RequestProfile"]:
+        """Make this the current request's profile (tasks started inside inherit it)."""
+        token = _current_profile.set(self)
+        try:
+            yield self
+        finally:
+            _current_profile.reset(token)
+            self.total_seconds = time.perf_counter() - self._started
+
+    def call(self, stage: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking call under cProfile (and torch.profiler) on this thread.
+
+        Args:
+            stage: Stage name for the report
+            fn: Function to run
+            *args, **kwargs: Passed to fn
+
+        Returns:
+            Whatever fn returns
+        """
+        torch_profiler = None
+        if self.torch_ops and _torch_profiler_lock.acquire(blocking=False):
+            try:
+                from torch.profiler import ProfilerActivity, profile
+
+                torch_profiler = profile(activities=[ProfilerActivity.CPU])
+                torch_profiler.__enter__()
+            except Exception:
+                torch_profiler = None
+                _torch_profiler_lock.release()
+        elif self.torch_ops:
+            self._torch_skipped += 1
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler already owns this interpreter (Python 3.12+)
+            profiler = None
+        start_time = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            seconds = time.perf_counter() - start_time
+            if torch_profiler is not None:
+                try:
+                    torch_profiler.__exit__(None, None, None)
+                    events = torch_profiler.key_averages()
+                finally:
+                    _torch_profiler_lock.release()
+            else:
+                events = []
+
+            with self._lock:
+                self.stages.append({
+                    "stage": stage,
+                    "thread": threading.current_thread().name,
+                    "seconds": round(seconds, 6),
+                })
+                if profiler is not None and self._stats is None:
+                    self._stats = pstats.Stats(profiler)
+                elif profiler is not None:
+                    self._stats.add(profiler)
+                for event in events:
+                    op = self._torch_ops.setdefault(event.key, {"calls": 0, "self_cpu_us": 0.0, "cpu_us": 0.0})
+                    op["calls"] += event.count
+                    op["self_cpu_us"] += event.self_cpu_time_total
+                    op["cpu_us"] += event.cpu_time_total
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Summarize the profile.
+
+        Returns:
+            Dictionary with id, path, created_at, total_seconds, stages
+            (one entry per profiled call), functions (top entries by
+            cumulative time) and torch_ops (top operators by self CPU time)
+        """
+        with self._lock:
+            functions = []
+            if self._stats is not None:
+                entries = sorted(self._stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+                for (filename, line, name), (_, calls, total, cumulative, _) in entries[:_TOP_FUNCTIONS]:
+                    functions.append({
+                        "function": f"{filename}:{line}({name})",
+                        "calls": calls,
+                        "total_seconds": round(total, 6),
+                        "cumulative_seconds": round(cumulative, 6),
+                    })
+
+            torch_ops = sorted(
+                ({"op": key, **values} for key, values in self._torch_ops.items()),
+                key=lambda op: op["self_cpu_us"],
+                reverse=True
+            )[:_TOP_TORCH_OPS]
+
+            return {
+                "id": self.id,
+                "path": self.path,
+                "created_at": self.created_at.isoformat(),
+                "total_seconds": round(self.total_seconds, 6) if self.total_seconds is not None else None,
+                "stages": list(self.stages),
+                "functions": functions,
+                "torch_ops": [
+                    {
+                        "op": op["op"],
+                        "calls": op["calls"],
+                        "self_cpu_ms": round(op["self_cpu_us"] / 1000, 3),
+                        "cpu_ms": round(op["cpu_us"] / 1000, 3),
+                    }
+                    for op in torch_ops
+                ],
+                "torch_ops_skipped_calls": self._torch_skipped,
+            }
+
+    def pstats_bytes(self) -> bytes:
+        """The merged cProfile data in .prof format (pstats, snakeviz)."""
+        with self._lock:
+            return marshal.dumps(self._stats.stats if self._stats is not None else {})
+
+
+def profiled(stage: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wrap a blocking call so it is profiled if the current request is.
+
+    Evaluate this in the request's context (before handing the call to a
+    worker thread). Without an active profile it returns fn unchanged, so
+    the cost when profiling is off is one context variable lookup.
+
+    Args:
+        stage: Stage name for the report
+        fn: Blocking function
+
+    Returns:
+        fn, or a wrapper running it under the request's profile
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return fn
+    return partial(profile.call, stage, fn)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    """The profile of the request being handled, if it is profiled."""
+    return _current_profile.get()
+
+
+def _check_token(request: Request) -> Optional[str]:
+    """
+    Read the caller's profiling token and check it against the allow-list.
+
+    Returns:
+        The token, or None if the caller did not ask for profiling (or it is disabled)
+
+    Raises:
+        HTTPException: 403 for a token that is not allow-listed
+    """
+    tokens = get_settings().PROFILING_TOKENS
+    if not tokens:
+        return None
+    token = request.headers.get("X-Profile-Token") or request.query_params.get("profile")
+    if not token:
+        return None
+    if not any(hmac.compare_digest(token.encode(), str(allowed).encode()) for allowed in tokens):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+    return token
+
+
+def request_profile(request: Request) -> Optional[RequestProfile]:
+    """
+    Dependency: a new profile if an allow-listed caller asked for one, else None.
+
+    Raises:
+        HTTPException: 403 for a token that is not allow-listed
+    """
+    if _check_token(request) is None:
+        return None
+    return RequestProfile(path=request.url.path, torch_ops=get_settings().PROFILING_TORCH_OPS)
+
+
+def require_profiling_token(request: Request):
+    """
+    Dependency: only allow-listed callers may read profiles.
+
+    Raises:
+        HTTPException: 404 if profiling is disabled or no token was sent,
+                       403 for a token that is not allow-listed
+    """
+    if _check_token(request) is None:
+        raise HTTPException(status_code=404, detail="Not found")
+
+
+# Global instance
+_profile_store = None
+
+
+def get_profile_store() -> LRUCache:
+    """Get or create the store of finished profiles (id -> RequestProfile)."""
+    global _profile_store
+    if _profile_store is None:
+        settings = get_settings()
+        _profile_store = LRUCache(max_size=settings.PROFILE_STORE_SIZE, ttl_seconds=settings.PROFILE_TTL_SECONDS)
+    return _profile_store
@@ -1,11 +1,27 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
+
+
+class EmotionWindow(BaseModel):
+    """Audio emotion detected for one window of a long recording."""
+    start: float
+    end: float
+    emotion: str
+    confidence: float
+
+
+class TranscriptSegment(BaseModel):
+    """Timed piece of the transcript (seconds from the start of the recording)."""
+    start: float
+    end: float
+    text: str
 
 
 class MoodAnalysisResponse(BaseModel):
     """Response schema for mood analysis."""
     transcribed_text: str
+    asr_model: Optional[str] = None
     audio_emotion: str
     audio_confidence: float
     text_emotion: str
@@ -13,6 +29,33 @@ class MoodAnalysisResponse(BaseModel):
     final_mood: str
     emoji: str
     description: str
+    audio_timeline: Optional[List[EmotionWindow]] = None
+    transcript_segments: Optional[List[TranscriptSegment]] = None
+
+
+class BatchItemResult(BaseModel):
+    """Result (or error) for one clip of a batch analysis."""
+    filename: str
+    result: Optional[MoodAnalysisResponse] = None
+    error: Optional[str] = None
+
+
+class BatchAnalysisResponse(BaseModel):
+    """Response schema for batch mood analysis."""
+    items: List[BatchItemResult]
+    succeeded: int
+    failed: int
+
+
+class JobResponse(BaseModel):
+    """Response schema for an asynchronous analysis job."""
+    job_id: str
+    status: str  # queued, running, succeeded or failed
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[MoodAnalysisResponse] = None
+    error: Optional[str] = None
 
 
 class AnalysisHistoryResponse(BaseModel):
@@ -20,6 +63,7 @@ class AnalysisHistoryResponse(BaseModel):
     id: int
     created_at: datetime
     transcribed_text: str
+    asr_model: Optional[str] = None
     audio_emotion: str
     audio_confidence: float
     text_emotion: str
@@ -32,6 +76,33 @@ class AnalysisHistoryResponse(BaseModel):
         from_attributes = True
 
 
+class StatsBucket(BaseModel):
+    """Analyses in one hour or day of the stats time series."""
+    bucket_start: datetime
+    analyses: int
+    final_mood: Dict[str, int]
+
+
+class SkippedStages(BaseModel):
+    """Analyses that ran without a stage."""
+    audio_emotion: int  # Long recordings with audio emotion disabled
+
+
+class MoodStatsResponse(BaseModel):
+    """Response schema for mood statistics over a time range."""
+    granularity: str
+    since: datetime
+    until: datetime
+    total: int
+    audio_confidence_avg: Optional[float] = None
+    text_confidence_avg: Optional[float] = None
+    skipped: SkippedStages
+    final_mood: Dict[str, int]
+    audio_emotion: Dict[str, int]
+    text_emotion: Dict[str, int]
+    series: List[StatsBucket]
+
+
 class FusionMatrixResponse(BaseModel):
     """Response schema for fusion matrix entry."""
     id: int
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from core.database import Base
+
+
+class MoodStats(Base):
+    """Hourly and daily rollup of voice_analysis, maintained as analyses are saved."""
+    __tablename__ = "mood_stats"
+
+    granularity = Column(String(10), primary_key=True)  # "hour" or "day"
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)  # UTC start of the bucket
+    final_mood = Column(String(100), primary_key=True)
+    audio_emotion = Column(String(50), primary_key=True)
+    text_emotion = Column(String(50), primary_key=True)
+    analyses = Column(Integer, nullable=False, default=0)
+    audio_confidence_sum = Column(Float, nullable=False, default=0.0)
+    text_confidence_sum = Column(Float, nullable=False, default=0.0)
+    audio_emotion_skipped = Column(Integer, nullable=False, default=0)  # Long clips without audio emotion
+
+    def __repr__(self):
+        return f"<MoodStats({self.granularity} {self.bucket_start}, mood={self.final_mood}, n={self.analyses})>"
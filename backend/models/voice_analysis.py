@@ -10,6 +10,7 @@ class VoiceAnalysis(Base):
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     transcribed_text = Column(Text, nullable=False)
+    asr_model = Column(String(50), nullable=True)  # Whisper size that produced the transcript
     audio_emotion = Column(String(50), nullable=False)
     audio_confidence = Column(Float, nullable=False)
     text_emotion = Column(String(50), nullable=False)
@@ -0,0 +1,420 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from core.config import get_settings
+from core.database import SessionLocal
+from core.metrics import count_skipped, observe_stage
+from core.profiling import profiled
+from services.analysis_writer import get_analysis_writer
+from services.audio_preprocessing import AudioBuffer, get_audio_preprocessor
+from services.fusion_service import FusionService
+from services.asr_cascade import get_asr_cascade, join_segments
+from services.audio_emotion import get_audio_emotion_service
+from services.text_emotion import get_text_emotion_service
+from services.voice_activity import TrimmedAudio, get_voice_activity_detector
+
+
+class NoSpeechDetected(Exception):
+    """Raised when a clip contains no transcribable speech."""
+
+
+class AnalysisPipeline:
+    """
+    Run the model stages of a mood analysis on a decoded audio buffer.
+
+    Silence is trimmed first (voice activity detection), so every model sees
+    only speech and clips without any are rejected before a model runs.
+    Transcription and audio emotion only depend on the audio, so they run
+    concurrently on worker threads; text emotion starts as soon as the
+    transcript is ready. Wall-clock time is roughly the slower of the two
+    audio stages plus the (short) text stage.
+    """
+
+    def model_fingerprint(self) -> str:
+        """Identify the models and settings that determine a result (for caching)."""
+        settings = get_settings()
+        return "|".join([
+            f"whisper={get_asr_cascade().fingerprint()}",
+            f"audio={get_audio_emotion_service().model_name}:{get_audio_emotion_service().backend}",
+            f"text={get_text_emotion_service().model_name}:{get_text_emotion_service().backend}",
+            f"vad={get_voice_activity_detector().backend}:{settings.VAD_THRESHOLD:g}:{settings.VAD_MIN_SILENCE_MS}",
+            f"windowed={settings.AUDIO_EMOTION_WINDOWED}:{settings.AUDIO_EMOTION_MAX_FULL_CLIP_SECONDS:g}"
+            f":{settings.AUDIO_EMOTION_WINDOW_SECONDS:g}:{settings.AUDIO_EMOTION_WINDOW_OVERLAP_SECONDS:g}",
+        ])
+
+    async def _trim(self, audio: AudioBuffer) -> Tuple[TrimmedAudio, float]:
+        """
+        Cut the buffer down to its speech, returning (trimmed, seconds).
+
+        Raises:
+            NoSpeechDetected: If the clip has no speech
+        """
+        start_time = time.time()
+        trimmed = await asyncio.to_thread(profiled("vad", get_voice_activity_detector().trim), audio)
+        vad_time = time.time() - start_time
+        observe_stage("vad", vad_time)
+        print(f"[INFO] Kept {trimmed.audio.duration_seconds:.1f}s of speech from {trimmed.source_duration_seconds:.1f}s")
+        if not trimmed.has_speech:
+            count_skipped("models", "no_speech")
+            raise NoSpeechDetected("No speech detected in audio file")
+        return trimmed, vad_time
+
+    @staticmethod
+    def _to_source_timeline(
+        trimmed: TrimmedAudio,
+        timeline: Optional[List[Dict[str, Any]]]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Express timeline windows in the original clip's time instead of the trimmed buffer's."""
+        if timeline is None:
+            return None
+        return [
+            {**window, "start": trimmed.to_source_seconds(window["start"]), "end": trimmed.to_source_seconds(window["end"])}
+            for window in timeline
+        ]
+
+    async def _detect_audio_emotion(
+        self,
+        audio: AudioBuffer
+    ) -> Tuple[str, float, Optional[List[Dict[str, Any]]], float]:
+        """Run audio emotion detection, returning (emotion, confidence, timeline, seconds)."""
+        settings = get_settings()
+        start_time = time.time()
+        duration_seconds = audio.duration_seconds
+        audio_emotion_service = get_audio_emotion_service()
+
+        if duration_seconds <= settings.AUDIO_EMOTION_MAX_FULL_CLIP_SECONDS:
+            print(f"[INFO] Audio duration: {duration_seconds:.1f}s - Running audio emotion detection")
+            audio_emotion, audio_confidence = await audio_emotion_service.detect_emotion(audio.samples)
+            timeline = None
+        elif settings.AUDIO_EMOTION_WINDOWED:
+            # Whole-clip wav2vec2 is too slow for long recordings; classify fixed windows instead
+            print(f"[INFO] Audio duration: {duration_seconds:.1f}s - Running windowed audio emotion detection")
+            audio_emotion, audio_confidence, timeline = await audio_emotion_service.detect_emotion_windowed(audio.samples)
+        else:
+            print(f"[INFO] Audio duration: {duration_seconds:.1f}s - Skipping audio emotion detection (too slow for long recordings)")
+            count_skipped("audio_emotion", "too_long")
+            # Default to neutral for fusion matrix
+            return "neutral", 0.0, None, time.time() - start_time
+
+        audio_time = time.time() - start_time
+        observe_stage("audio_emotion", audio_time)
+        return audio_emotion, audio_confidence, timeline, audio_time
+
+    async def _transcribe(self, trimmed: TrimmedAudio) -> Tuple[str, List[Dict[str, Any]], str, float]:
+        """Transcribe the speech, returning (text, segments, model size, seconds)."""
+        settings = get_settings()
+        start_time = time.time()
+        cascade = get_asr_cascade()
+        audio = trimmed.audio
+
+        chunks = None
+        if audio.duration_seconds > settings.ASR_LONG_AUDIO_SECONDS:
+            # Decode pause-delimited chunks in parallel instead of one long stream
+            chunks = trimmed.chunks(settings.ASR_CHUNK_SECONDS)
+            print(f"[INFO] Transcribing {audio.duration_seconds:.1f}s of speech as {len(chunks)} parallel chunks...")
+        else:
+            print(f"[INFO] Transcribing audio using local faster-whisper ({cascade.fast.model_size} model)...")
+
+        segments, asr_model = await cascade.transcribe_segments(audio.samples, chunks)
+        whisper_time = time.time() - start_time
+        observe_stage("whisper", whisper_time)
+
+        # Report segment times on the original recording's timeline
+        segments = [
+            {
+                "start": trimmed.to_source_seconds(segment["start"]),
+                "end": trimmed.to_source_seconds(segment["end"]),
+                "text": segment["text"]
+            }
+            for segment in segments if segment["text"]
+        ]
+        return join_segments(segments), segments, asr_model, whisper_time
+
+    async def run(self, audio: AudioBuffer) -> Dict[str, Any]:
+        """
+        Trim silence, transcribe the speech and detect audio and text emotions.
+
+        Args:
+            audio: Decoded audio buffer
+
+        Returns:
+            Dictionary with transcribed_text, transcript_segments (timed
+            text), asr_model (Whisper size used), audio_emotion, audio_confidence,
+            audio_timeline (per-window emotions for long clips, else None),
+            text_emotion, text_confidence and per-stage timings (seconds)
+
+        Raises:
+            NoSpeechDetected: If voice activity detection finds no speech
+            Exception: If any model stage fails
+        """
+        trimmed, vad_time = await self._trim(audio)
+        audio = trimmed.audio
+
+        audio_task = asyncio.create_task(self._detect_audio_emotion(audio))
+
+        try:
+            text, transcript_segments, asr_model, whisper_time = await self._transcribe(trimmed)
+
+            text_emotion = "neutral"
+            text_confidence = 0.0
+            text_time = 0.0
+            if text:
+                start_time = time.time()
+                text_emotion, text_confidence = await get_text_emotion_service().detect_emotion(text)
+                text_time = time.time() - start_time
+                observe_stage("text_emotion", text_time)
+            else:
+                count_skipped("text_emotion", "empty_transcript")
+
+            audio_emotion, audio_confidence, audio_timeline, audio_time = await audio_task
+
+        except BaseException:
+            # Don't leave the audio stage running unobserved if transcription fails
+            audio_task.cancel()
+            await asyncio.gather(audio_task, return_exceptions=True)
+            raise
+
+        return {
+            "transcribed_text": text,
+            "transcript_segments": transcript_segments,
+            "asr_model": asr_model,
+            "audio_emotion": audio_emotion,
+            "audio_confidence": audio_confidence,
+            "audio_timeline": self._to_source_timeline(trimmed, audio_timeline),
+            "text_emotion": text_emotion,
+            "text_confidence": text_confidence,
+            "timings": {
+                "vad": vad_time,
+                "whisper": whisper_time,
+                "audio_emotion": audio_time,
+                "text_emotion": text_time,
+            },
+        }
+
+    async def decode_and_run(self, source: Any, format: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Decode an upload once and run the model stages on it.
+
+        Args:
+            source: File path, bytes or binary file object holding the upload
+            format: Container hint such as "webm" or "mp3"
+
+        Returns:
+            Same dictionary as run(), with the decode time added to timings
+
+        Raises:
+            Exception: If decoding or any model stage fails
+        """
+        # Decode once to a 16kHz mono buffer shared by every model
+        start_time = time.time()
+        audio = await asyncio.to_thread(profiled("decode", get_audio_preprocessor().decode), source, format)
+        decode_time = time.time() - start_time
+        observe_stage("decode", decode_time)
+
+        # Transcribe and detect audio emotion concurrently, then detect
+        # emotion from the transcript as soon as it is ready
+        result = await self.run(audio)
+        result["timings"]["decode"] = decode_time
+        return result
+
+    async def finalize(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fuse a pipeline result with the fusion matrix and save it.
+
+        The fusion and insert times are added to result["timings"] (with
+        write-behind enabled, db_commit only covers buffering the result).
+
+        Args:
+            result: Output of run() or decode_and_run()
+
+        Returns:
+            MoodAnalysisResponse fields (see build_mood_result)
+
+        Raises:
+            NoSpeechDetected: If the transcript is empty
+            Exception: If the fusion lookup or the insert fails
+        """
+        if not result["transcribed_text"]:
+            raise NoSpeechDetected("No speech detected in audio file")
+
+        timings = result.setdefault("timings", {})
+        # Uses its own session: the analysis may outlive the request that
+        # started it (coalesced callers and background jobs wait on it)
+        async with SessionLocal() as db:
+            start_time = time.time()
+            fusion_result = await FusionService.get_final_mood(
+                db=db,
+                audio_emotion=result["audio_emotion"],
+                text_emotion=result["text_emotion"]
+            )
+            timings["fusion"] = time.time() - start_time
+            observe_stage("fusion", timings["fusion"])
+            analysis_result = build_mood_result(result, fusion_result)
+
+            start_time = time.time()
+            await get_analysis_writer().save(db, [analysis_result])
+            timings["db_commit"] = time.time() - start_time
+            observe_stage("db_commit", timings["db_commit"])
+
+        return analysis_result
+
+    async def run_batch(self, audios: List[AudioBuffer]) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Analyze many clips with batched model passes.
+
+        Silence is trimmed from every clip first; clips without speech fail
+        without entering a model pass. Only the emotion models are batched:
+        short clips are sorted by length and classified in padded Wav2Vec2
+        batches (long clips use windowed mode), and all transcripts go
+        through one DistilRoBERTa pass. Whisper has no batched decode, so
+        each clip is transcribed as in run() (long clips as parallel
+        chunks), concurrently on the ASR pool.
+
+        Args:
+            audios: Decoded audio buffers
+
+        Returns:
+            One entry per clip: the same dict run() returns (without timings),
+            or the Exception that made that clip fail
+        """
+        detector = get_voice_activity_detector()
+        trimmed_clips: List[Any] = await asyncio.gather(
+            *(asyncio.to_thread(detector.trim, audio) for audio in audios),
+            return_exceptions=True
+        )
+
+        results: List[Union[Dict[str, Any], Exception]] = []
+        speech: Dict[int, TrimmedAudio] = {}
+        for i, trimmed in enumerate(trimmed_clips):
+            if isinstance(trimmed, BaseException):
+                results.append(trimmed if isinstance(trimmed, Exception) else Exception(str(trimmed)))
+            elif not trimmed.has_speech:
+                count_skipped("models", "no_speech")
+                results.append(NoSpeechDetected("No speech detected in audio file"))
+            else:
+                results.append(None)
+                speech[i] = trimmed
+
+        if speech:
+            outputs = await self._run_batch_models(list(speech.values()))
+            for (i, trimmed), output in zip(speech.items(), outputs):
+                if isinstance(output, dict):
+                    output["audio_timeline"] = self._to_source_timeline(trimmed, output["audio_timeline"])
+                results[i] = output
+
+        return results
+
+    async def _run_batch_models(self, clips: List[TrimmedAudio]) -> List[Union[Dict[str, Any], Exception]]:
+        """Batched model passes of run_batch() over already trimmed clips."""
+        settings = get_settings()
+        audio_emotion_service = get_audio_emotion_service()
+        audios = [trimmed.audio for trimmed in clips]
+
+        async def detect_audio_emotions() -> List[Any]:
+            outputs: List[Any] = [None] * len(audios)
+            short, long = [], []
+            for i, audio in enumerate(audios):
+                if audio.duration_seconds <= settings.AUDIO_EMOTION_MAX_FULL_CLIP_SECONDS:
+                    short.append(i)
+                else:
+                    long.append(i)
+
+            # Length-sorted groups keep padding waste low
+            short.sort(key=lambda i: len(audios[i].samples))
+            batch_size = audio_emotion_service.batcher.max_batch_size
+            for start in range(0, len(short), batch_size):
+                group = short[start:start + batch_size]
+                try:
+                    predictions = await asyncio.to_thread(
+                        audio_emotion_service.predict_batch,
+                        [audios[i].samples for i in group]
+                    )
+                    for i, (emotion, confidence) in zip(group, predictions):
+                        outputs[i] = (emotion, confidence, None)
+                except Exception as e:
+                    for i in group:
+                        outputs[i] = e
+
+            for i in long:
+                if not settings.AUDIO_EMOTION_WINDOWED:
+                    count_skipped("audio_emotion", "too_long")
+                    outputs[i] = ("neutral", 0.0, None)
+                    continue
+                try:
+                    outputs[i] = await audio_emotion_service.detect_emotion_windowed(audios[i].samples)
+                except Exception as e:
+                    outputs[i] = e
+
+            return outputs
+
+        start_time = time.time()
+        transcripts, audio_outputs = await asyncio.gather(
+            asyncio.gather(
+                *(self._transcribe(trimmed) for trimmed in clips),
+                return_exceptions=True
+            ),
+            detect_audio_emotions()
+        )
+
+        texts = [output[0] if isinstance(output, tuple) else "" for output in transcripts]
+        try:
+            text_outputs: List[Any] = await get_text_emotion_service().detect_emotions(texts)
+        except Exception as e:
+            text_outputs = [e] * len(audios)
+        observe_stage("batch_models", time.time() - start_time)
+
+        results: List[Union[Dict[str, Any], Exception]] = []
+        for transcript, audio_output, text_output in zip(transcripts, audio_outputs, text_outputs):
+            error = next((out for out in (transcript, audio_output, text_output) if isinstance(out, BaseException)), None)
+            if error is not None:
+                results.append(error if isinstance(error, Exception) else Exception(str(error)))
+                continue
+            transcript, transcript_segments, asr_model, _ = transcript
+            if not transcript:
+                results.append(NoSpeechDetected("No speech detected in audio file"))
+                continue
+
+            audio_emotion, audio_confidence, audio_timeline = audio_output
+            text_emotion, text_confidence = text_output
+            results.append({
+                "transcribed_text": transcript,
+                "transcript_segments": transcript_segments,
+                "asr_model": asr_model,
+                "audio_emotion": audio_emotion,
+                "audio_confidence": audio_confidence,
+                "audio_timeline": audio_timeline,
+                "text_emotion": text_emotion,
+                "text_confidence": text_confidence,
+            })
+
+        return results
+
+
+def build_mood_result(result: Dict[str, Any], fusion_result: Dict[str, str]) -> Dict[str, Any]:
+    """Combine pipeline output and fusion lookup into MoodAnalysisResponse fields."""
+    return {
+        "transcribed_text": result["transcribed_text"],
+        "asr_model": result.get("asr_model"),
+        "transcript_segments": result.get("transcript_segments"),
+        "audio_emotion": result["audio_emotion"],
+        "audio_confidence": result["audio_confidence"],
+        "text_emotion": result["text_emotion"],
+        "text_confidence": result["text_confidence"],
+        "final_mood": fusion_result["final_mood"],
+        "emoji": fusion_result["emoji"],
+        "description": fusion_result["description"],
+        "audio_timeline": result["audio_timeline"]
+    }
+
+
+# Global instance
+_analysis_pipeline = None
+
+
+def get_analysis_pipeline() -> AnalysisPipeline:
+    """Get or create analysis pipeline singleton."""
+    global _analysis_pipeline
+    if _analysis_pipeline is None:
+        _analysis_pipeline = AnalysisPipeline()
+    return _analysis_pipeline
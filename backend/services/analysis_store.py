@@ -0,0 +1,141 @@
+import base64
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.voice_analysis import VoiceAnalysis
+from services.mood_stats import record_mood_stats
+
+
+# MoodAnalysisResponse fields stored in voice_analysis
+RECORD_FIELDS = (
+    "transcribed_text",
+    "asr_model",
+    "audio_emotion",
+    "audio_confidence",
+    "text_emotion",
+    "text_confidence",
+    "final_mood",
+    "emoji",
+    "description",
+)
+
+
+async def save_analyses(db: AsyncSession, analyses: List[Dict[str, Any]]):
+    """
+    Insert finished analyses in a single multi-row INSERT and commit.
+
+    The mood_stats rollup is updated in the same transaction.
+
+    Args:
+        db: Database session
+        analyses: Analysis result dicts (MoodAnalysisResponse fields), with
+                  an optional created_at (default: now)
+
+    Raises:
+        Exception: If the insert fails
+    """
+    if not analyses:
+        return
+
+    # Stamped here rather than by the database's now(): SQLite stores its
+    # default without microseconds, which breaks string comparison with
+    # history cursors (and the rollup must use the same time)
+    created_at = datetime.now(timezone.utc)
+    rows = [
+        {**{field: analysis[field] for field in RECORD_FIELDS}, "created_at": analysis.get("created_at") or created_at}
+        for analysis in analyses
+    ]
+    try:
+        await db.execute(insert(VoiceAnalysis), rows)
+        await record_mood_stats(db, rows)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+
+# Columns /api/history can return; id and created_at are always included (they form the cursor)
+HISTORY_FIELDS = ("id", "created_at") + RECORD_FIELDS
+
+
+class InvalidCursor(ValueError):
+    """Raised when a history cursor cannot be decoded."""
+
+
+def encode_cursor(created_at: datetime, analysis_id: int) -> str:
+    """Encode the position after a row as an opaque cursor."""
+    raw = f"{created_at.isoformat()}|{analysis_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor from encode_cursor().
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, analysis_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(analysis_id)
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+
+async def query_history(
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[str] = None,
+    moods: Optional[Sequence[str]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[Sequence[str]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Read one page of analysis history, newest first.
+
+    Pages are keyset-paginated on (created_at, id): the cursor is the last
+    row of the previous page, so every page is an index range scan that
+    costs the same however deep it is (OFFSET would re-read all the rows
+    it skips).
+
+    Args:
+        db: Database session
+        limit: Page size
+        cursor: next_cursor of the previous page (None for the first page)
+        moods: Only rows with one of these final_mood values
+        since: Only rows created at or after this time
+        until: Only rows created before this time
+        fields: Columns to return (HISTORY_FIELDS; None for all). Columns
+                left out are not read from the database
+
+    Returns:
+        Tuple of (rows as dicts, cursor for the next page or None if this is the last)
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    selected = [field for field in HISTORY_FIELDS if fields is None or field in fields or field in ("id", "created_at")]
+    query = select(*(getattr(VoiceAnalysis, field) for field in selected))
+
+    if cursor:
+        created_at, analysis_id = decode_cursor(cursor)
+        query = query.where(tuple_(VoiceAnalysis.created_at, VoiceAnalysis.id) < tuple_(created_at, analysis_id))
+    if moods:
+        query = query.where(VoiceAnalysis.final_mood.in_(moods))
+    if since is not None:
+        query = query.where(VoiceAnalysis.created_at >= since)
+    if until is not None:
+        query = query.where(VoiceAnalysis.created_at < until)
+
+    # One extra row tells whether another page follows
+    query = query.order_by(VoiceAnalysis.created_at.desc(), VoiceAnalysis.id.desc()).limit(limit + 1)
+    rows = [row._asdict() for row in await db.execute(query)]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return rows, next_cursor
@@ -0,0 +1,190 @@
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import get_settings
+from core.database import SessionLocal
+from core.metrics import observe_stage
+from services.analysis_store import save_analyses
+
+
+class AnalysisWriter:
+    """
+    Write-behind persistence of finished analyses.
+
+    When enabled, save() only appends the analysis (stamped with its
+    creation time) to a bounded in-memory buffer and returns; a background
+    task bulk-inserts the buffer with one multi-row INSERT every
+    `flush_seconds`, or as soon as `batch_size` analyses are waiting.
+    Commit latency leaves the request path and the database sees one
+    transaction per batch instead of one per analysis.
+
+    The buffer never holds more than `max_buffer` analyses: when it is
+    full, the caller writes its own analyses synchronously, which slows
+    producers down to what the database can absorb. Buffered analyses are
+    flushed on shutdown; a hard crash loses at most the buffer.
+    """
+
+    def __init__(self, enabled: bool, batch_size: int, flush_seconds: float, max_buffer: int):
+        """Initialize the writer (the flusher starts with start())."""
+        self.enabled = enabled
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.max_buffer = max(self.batch_size, max_buffer)
+
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Counters exposed through stats()
+        self._written = 0
+        self._batches = 0
+        self._overflows = 0
+        self._failures = 0
+        self._dropped = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether analyses are currently buffered instead of written."""
+        return self._task is not None
+
+    def start(self):
+        """Start the flusher task (no-op unless write-behind is enabled)."""
+        if not self.enabled or self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._flusher())
+        print(f"[INFO] Write-behind enabled (batch {self.batch_size}, every {self.flush_seconds}s, buffer {self.max_buffer})")
+
+    async def stop(self):
+        """Stop the flusher and write everything still buffered."""
+        if self._task is None:
+            return
+        # Let the flusher finish the batch it may be writing (cancelling it
+        # mid-flush would lose that batch), then drain the rest here
+        task, self._task = self._task, None
+        self._stopping = True
+        self._wakeup.set()
+        await asyncio.gather(task, return_exceptions=True)
+        while self._buffer:
+            if not await self._flush():
+                break
+        if self._buffer:
+            print(f"[ERROR] Write-behind: {len(self._buffer)} analyses could not be written on shutdown")
+
+    async def save(self, db: AsyncSession, analyses: List[Dict[str, Any]]):
+        """
+        Persist finished analyses: buffered if write-behind is running, else at once.
+
+        Args:
+            db: Database session (used for synchronous writes)
+            analyses: Analysis result dicts (MoodAnalysisResponse fields)
+
+        Raises:
+            Exception: If a synchronous insert fails
+        """
+        if not analyses:
+            return
+        if self._task is None:
+            await save_analyses(db, analyses)
+            return
+
+        # Stamped now so created_at (and the mood_stats bucket) is the
+        # analysis time, not the flush time
+        created_at = datetime.now(timezone.utc)
+        stamped = [{**analysis, "created_at": created_at} for analysis in analyses]
+        if len(self._buffer) + len(stamped) > self.max_buffer:
+            self._overflows += 1
+            await save_analyses(db, stamped)
+            return
+
+        self._buffer.extend(stamped)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _flusher(self):
+        """Flush the buffer every flush_seconds, or sooner once a batch is waiting (until stop())."""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._buffer and not self._stopping:
+                if not await self._flush():
+                    break
+                if len(self._buffer) < self.batch_size:
+                    break
+
+    async def _flush(self) -> bool:
+        """
+        Insert up to batch_size buffered analyses in one transaction.
+
+        A failed batch goes back to the front of the buffer and is retried on
+        the next flush; whatever no longer fits in the buffer is dropped.
+
+        Returns:
+            Whether the batch was written
+        """
+        batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+        if not batch:
+            return True
+
+        start_time = time.time()
+        try:
+            async with SessionLocal() as db:
+                await save_analyses(db, batch)
+        except asyncio.CancelledError:
+            # Cancelled mid-write: keep the batch for the next flush
+            self._buffer.extendleft(reversed(batch))
+            raise
+        except Exception as e:
+            self._failures += 1
+            self._buffer.extendleft(reversed(batch))
+            while len(self._buffer) > self.max_buffer:
+                self._buffer.pop()
+                self._dropped += 1
+            print(f"[ERROR] Write-behind flush of {len(batch)} analyses failed: {str(e)}")
+            return False
+
+        observe_stage("db_flush", time.time() - start_time)
+        self._written += len(batch)
+        self._batches += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Get buffer depth and write counters."""
+        return {
+            "enabled": self.enabled,
+            "buffered": len(self._buffer),
+            "max_buffer": self.max_buffer,
+            "written": self._written,
+            "batches": self._batches,
+            "overflows": self._overflows,
+            "failed_flushes": self._failures,
+            "dropped": self._dropped,
+        }
+
+
+# Global instance
+_analysis_writer = None
+
+
+def get_analysis_writer() -> AnalysisWriter:
+    """Get or create analysis writer singleton."""
+    global _analysis_writer
+    if _analysis_writer is None:
+        settings = get_settings()
+        _analysis_writer = AnalysisWriter(
+            enabled=settings.WRITE_BEHIND_ENABLED,
+            batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+            flush_seconds=settings.WRITE_BEHIND_FLUSH_SECONDS,
+            max_buffer=settings.WRITE_BEHIND_MAX_BUFFER
+        )
+    return _analysis_writer
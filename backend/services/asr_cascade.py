@@ -0,0 +1,204 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.config import get_settings
+from core.profiling import profiled
+from services.whisper_local_service import WhisperLocalService, get_asr_workers, get_whisper_service
+
+
+def join_segments(segments: List[Dict[str, Any]]) -> str:
+    """Join segment texts into one transcript."""
+    return " ".join(segment["text"] for segment in segments if segment["text"]).strip()
+
+
+class ASRCascade:
+    """
+    Transcribe with the fast Whisper model and escalate only hard clips.
+
+    Every clip goes through the fast model first (faster-whisper tiny). If
+    its segments look unreliable - a low duration-weighted avg_logprob, a
+    high no_speech_prob on a segment that still produced text (typical of
+    hallucinations), or no text at all for audio the VAD kept as speech -
+    the clip is transcribed again with the larger model and that transcript
+    is used. Most requests keep tiny-model latency.
+
+    Long recordings are transcribed as independent chunks (cut at pauses)
+    on a pool of `workers` threads, one per faster-whisper model worker,
+    and the segments are stitched back in order. Each chunk escalates on
+    its own.
+    """
+
+    def __init__(
+        self,
+        fast: WhisperLocalService,
+        accurate: Optional[WhisperLocalService],
+        min_avg_logprob: float = -0.8,
+        max_no_speech_prob: float = 0.6,
+        workers: int = 1
+    ):
+        """
+        Initialize the cascade.
+
+        Args:
+            fast: Service that transcribes every clip
+            accurate: Service for low-confidence clips (None disables escalation)
+            min_avg_logprob: Escalate below this duration-weighted avg_logprob
+            max_no_speech_prob: Escalate if a segment with text exceeds this
+            workers: Transcriptions running at the same time
+        """
+        self.fast = fast
+        self.accurate = accurate
+        self.min_avg_logprob = min_avg_logprob
+        self.max_no_speech_prob = max_no_speech_prob
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="asr")
+        # Counters are updated from the ASR pool threads
+        self._stats_lock = threading.Lock()
+        self._escalations = 0
+        self._total = 0
+        self._chunked = 0
+
+    def escalation_reason(self, segments: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        Decide whether a fast-model transcript needs the larger model.
+
+        Args:
+            segments: Output of WhisperLocalService.transcribe_segments()
+
+        Returns:
+            Why to escalate, or None to keep the transcript
+        """
+        spoken = [segment for segment in segments if segment["text"]]
+        if not spoken:
+            return "empty transcript"
+
+        durations = [max(segment["end"] - segment["start"], 1e-3) for segment in spoken]
+        avg_logprob = sum(
+            segment["avg_logprob"] * duration for segment, duration in zip(spoken, durations)
+        ) / sum(durations)
+        if avg_logprob < self.min_avg_logprob:
+            return f"avg_logprob {avg_logprob:.2f}"
+
+        no_speech_prob = max(segment["no_speech_prob"] for segment in spoken)
+        if no_speech_prob > self.max_no_speech_prob:
+            return f"no_speech_prob {no_speech_prob:.2f}"
+
+        return None
+
+    def transcribe_segments_sync(self, audio: np.ndarray) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Transcribe a waveform, escalating if needed (blocking).
+
+        Args:
+            audio: Mono float32 waveform at 16kHz
+
+        Returns:
+            Tuple of (segments, model size that produced them); segments are
+            dicts as returned by WhisperLocalService.transcribe_segments()
+        """
+        with self._stats_lock:
+            self._total += 1
+        segments = self.fast.transcribe_segments(audio)
+        model_size = self.fast.model_size
+
+        reason = self.escalation_reason(segments) if self.accurate is not None else None
+        if reason is not None:
+            with self._stats_lock:
+                self._escalations += 1
+            print(f"[INFO] Low-confidence transcript ({reason}); escalating to {self.accurate.model_size} model")
+            segments = self.accurate.transcribe_segments(audio)
+            model_size = self.accurate.model_size
+
+        return segments, model_size
+
+    async def transcribe_segments(
+        self,
+        audio: np.ndarray,
+        chunks: Optional[List[Tuple[int, int]]] = None
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Transcribe a waveform on the ASR pool, optionally as parallel chunks.
+
+        Args:
+            audio: Mono float32 waveform at 16kHz
+            chunks: (start, end) sample offsets to transcribe independently
+                    (e.g. TrimmedAudio.chunks()); None for a single pass
+
+        Returns:
+            Tuple of (segments with times relative to `audio`, model size);
+            the larger model's size if any chunk escalated
+
+        Raises:
+            Exception: If transcription fails
+        """
+        loop = asyncio.get_running_loop()
+        transcribe = profiled("whisper", self.transcribe_segments_sync)
+        try:
+            if not chunks or len(chunks) == 1:
+                return await loop.run_in_executor(self._executor, transcribe, audio)
+
+            with self._stats_lock:
+                self._chunked += 1
+            outputs = await asyncio.gather(*(
+                loop.run_in_executor(self._executor, transcribe, audio[start:end])
+                for start, end in chunks
+            ))
+        except Exception as e:
+            raise Exception(f"Faster-whisper transcription failed: {str(e)}")
+
+        # Stitch chunk segments back in order on the clip's timeline
+        segments = []
+        for (start, _), (chunk_segments, _) in zip(chunks, outputs):
+            offset = start / 16000
+            segments.extend(
+                {**segment, "start": segment["start"] + offset, "end": segment["end"] + offset}
+                for segment in chunk_segments
+            )
+        escalated = self.accurate is not None and any(model == self.accurate.model_size for _, model in outputs)
+        return segments, (self.accurate.model_size if escalated else self.fast.model_size)
+
+    def fingerprint(self) -> str:
+        """Identify the cascade configuration (for result caching)."""
+        if self.accurate is None:
+            return self.fast.model_size
+        return f"{self.fast.model_size}>{self.accurate.model_size}:{self.min_avg_logprob:g}:{self.max_no_speech_prob:g}"
+
+    def stats(self) -> Dict[str, Any]:
+        """Get how often transcripts were escalated."""
+        with self._stats_lock:
+            total, chunked, escalations = self._total, self._chunked, self._escalations
+        return {
+            "fast_model": self.fast.model_size,
+            "accurate_model": self.accurate.model_size if self.accurate else None,
+            "workers": self.workers,
+            "transcriptions": total,
+            "chunked_transcriptions": chunked,
+            "escalations": escalations,
+            "escalation_rate": escalations / total if total else 0.0,
+        }
+
+
+# Global instance
+_asr_cascade = None
+
+
+def get_asr_cascade() -> ASRCascade:
+    """Get or create ASR cascade singleton."""
+    global _asr_cascade
+    if _asr_cascade is None:
+        settings = get_settings()
+        accurate = None
+        if settings.ASR_CASCADE_ENABLED and settings.ASR_ESCALATION_MODEL != settings.ASR_FAST_MODEL:
+            accurate = get_whisper_service(settings.ASR_ESCALATION_MODEL)
+        _asr_cascade = ASRCascade(
+            fast=get_whisper_service(settings.ASR_FAST_MODEL),
+            accurate=accurate,
+            min_avg_logprob=settings.ASR_MIN_AVG_LOGPROB,
+            max_no_speech_prob=settings.ASR_MAX_NO_SPEECH_PROB,
+            workers=get_asr_workers()
+        )
+    return _asr_cascade
@@ -1,9 +1,14 @@
+import asyncio
+import threading
 import torch
-import torchaudio
 import librosa
 import numpy as np
 from transformers import Wav2Vec2FeatureExtractor, Wav2Vec2ForSequenceClassification
-from typing import Tuple
+from typing import Any, Dict, List, Tuple
+from core.config import get_settings
+from core.profiling import current_profile, profiled
+from services.batching import MicroBatcher
+from services.onnx_backend import check_parity, load_onnx_classifier
 
 
 class AudioEmotionService:
@@ -43,12 +48,77 @@ class AudioEmotionService:
             "calm": "neutral"  # Map calm to neutral for fusion matrix
         }
 
-    async def detect_emotion(self, audio_path: str) -> Tuple[str, float]:
+        # Concurrent requests of similar duration share one padded forward pass
+        settings = get_settings()
+        self.bucket_samples = max(1, int(settings.AUDIO_BATCH_BUCKET_SECONDS * 16000))
+        self.batcher = MicroBatcher(
+            self.predict_batch,
+            max_batch_size=settings.AUDIO_BATCH_MAX_SIZE,
+            max_wait_ms=settings.AUDIO_BATCH_WAIT_MS,
+            name="audio_emotion",
+            bucket_key=self._duration_bucket
+        )
+
+        # Windowed mode for long recordings
+        self.window_samples = max(1, int(settings.AUDIO_EMOTION_WINDOW_SECONDS * 16000))
+        self.hop_samples = max(1, self.window_samples - int(settings.AUDIO_EMOTION_WINDOW_OVERLAP_SECONDS * 16000))
+        self.window_batch_size = max(1, settings.AUDIO_EMOTION_WINDOW_BATCH_SIZE)
+
+        # Optional ONNX Runtime backend (INFERENCE_BACKEND=onnx)
+        self.onnx = None
+        self.backend = "pytorch"
+        if settings.INFERENCE_BACKEND == "onnx":
+            self._enable_onnx()
+
+    def _enable_onnx(self):
+        """Switch to the ONNX backend if it loads and agrees with PyTorch."""
+        settings = get_settings()
+        if self.device != "cpu":
+            print("[WARN] ONNX backend is CPU-only; audio emotion stays on PyTorch")
+            return
+
+        # Fixed synthetic clips: a tone, a chirp and low noise at different lengths
+        rng = np.random.default_rng(0)
+        t = np.arange(3 * 16000) / 16000
+        waveforms = [
+            (0.3 * np.sin(2 * np.pi * 220 * t[:16000])).astype(np.float32),
+            (0.3 * np.sin(2 * np.pi * (150 + 100 * t) * t)).astype(np.float32),
+            (0.05 * rng.standard_normal(2 * 16000)).astype(np.float32),
+        ]
+
+        sample_inputs = self._extract_features(waveforms[:2])
+        onnx = load_onnx_classifier(
+            self.model,
+            self.model_name,
+            {"input_values": sample_inputs["input_values"], "attention_mask": sample_inputs["attention_mask"]}
+        )
+        if onnx is None:
+            return
+
+        if settings.ONNX_PARITY_CHECK:
+            reference = self._predict_probabilities(waveforms)
+            self.onnx = onnx
+            candidate = self._predict_probabilities(waveforms)
+            if not check_parity(self.model_name, reference, candidate, settings.ONNX_PARITY_TOLERANCE):
+                print("[WARN] Audio emotion stays on PyTorch")
+                self.onnx = None
+                return
+
+        self.onnx = onnx
+        self.backend = onnx.name
+        # ONNX Runtime holds its own copy of the weights
+        self.model = None
+
+    def _duration_bucket(self, audio: np.ndarray) -> int:
+        """Length bucket used to group clips of similar duration."""
+        return len(audio) // self.bucket_samples
+
+    async def detect_emotion(self, audio: np.ndarray) -> Tuple[str, float]:
         """
-        Detect emotion from audio file.
+        Detect emotion from a decoded waveform.
 
         Args:
-            audio_path: Path to the audio file
+            audio: Mono float32 waveform at 16kHz (see AudioPreprocessor)
 
         Returns:
             Tuple of (emotion_label, confidence_score)
@@ -56,30 +126,32 @@ class AudioEmotionService:
         Raises:
             Exception: If emotion detection fails
         """
-        try:
-            # Load and resample audio to 16kHz (required by Wav2Vec2)
-            waveform, sample_rate = torchaudio.load(audio_path)
-
-            # Convert to mono if stereo
-            if waveform.shape[0] > 1:
-                waveform = torch.mean(waveform, dim=0, keepdim=True)
+        profile = current_profile()
+        if profile is not None:
+            # A profiled request runs its own forward pass so the time is attributable
+            predictions = await asyncio.to_thread(profile.call, "audio_emotion", self.predict_batch, [audio])
+            return predictions[0]
 
-            # Resample to 16kHz if needed
-            if sample_rate != 16000:
-                resampler = torchaudio.transforms.Resample(sample_rate, 16000)
-                waveform = resampler(waveform)
+        # Joins the batch for its duration bucket; Wav2Vec2 runs on a worker thread
+        return await self.batcher.submit(audio)
 
-            # Convert to numpy and flatten
-            audio_array = waveform.squeeze().numpy()
+    def _extract_features(self, waveforms: List[np.ndarray]) -> Dict[str, torch.Tensor]:
+        """Batch waveforms for the model; shorter clips are zero-padded and masked out."""
+        return self.feature_extractor(
+            waveforms,
+            sampling_rate=16000,
+            return_tensors="pt",
+            padding=True,
+            return_attention_mask=True
+        )
 
-            # Extract features
-            inputs = self.feature_extractor(
-                audio_array,
-                sampling_rate=16000,
-                return_tensors="pt",
-                padding=True
-            )
+    def _predict_probabilities(self, waveforms: List[np.ndarray]) -> torch.Tensor:
+        """Run one padded forward pass and return class probabilities (N x classes)."""
+        inputs = self._extract_features(waveforms)
 
+        if self.onnx is not None:
+            logits = self.onnx.logits(inputs)
+        else:
             # Move to device
             inputs = {k: v.to(self.device) for k, v in inputs.items()}
 
@@ -88,16 +160,92 @@ class AudioEmotionService:
                 outputs = self.model(**inputs)
                 logits = outputs.logits
 
-            # Get probabilities
-            probabilities = torch.nn.functional.softmax(logits, dim=-1)
-            predicted_class = torch.argmax(probabilities, dim=-1).item()
-            confidence = probabilities[0][predicted_class].item()
+        # Get probabilities
+        return torch.nn.functional.softmax(logits, dim=-1).cpu()
+
+    def _to_label(self, probabilities: torch.Tensor) -> Tuple[str, float]:
+        """Map one probability vector to a standardized (emotion, confidence)."""
+        confidence, predicted_class = torch.max(probabilities, dim=-1)
+        # Get emotion label and map to standard format
+        raw_emotion = self.emotion_labels[predicted_class.item()]
+        emotion = self.emotion_mapping.get(raw_emotion, raw_emotion)
+        return emotion, confidence.item()
+
+    def predict_batch(self, waveforms: List[np.ndarray]) -> List[Tuple[str, float]]:
+        """
+        Detect emotion for several waveforms with one padded forward pass (blocking).
+
+        Args:
+            waveforms: Mono float32 waveforms at 16kHz
+
+        Returns:
+            List of (emotion_label, confidence_score), one per waveform
+
+        Raises:
+            Exception: If emotion detection fails
+        """
+        try:
+            probabilities = self._predict_probabilities(waveforms)
+            return [self._to_label(row) for row in probabilities]
+
+        except Exception as e:
+            raise Exception(f"Audio emotion detection failed: {str(e)}")
+
+    def _window_starts(self, num_samples: int) -> List[int]:
+        """Start offsets of fixed-size overlapping windows covering the clip."""
+        if num_samples <= self.window_samples:
+            return [0]
+        starts = list(range(0, num_samples - self.window_samples + 1, self.hop_samples))
+        # Align a final window with the end of the clip instead of keeping a short tail
+        if starts[-1] + self.window_samples < num_samples:
+            starts.append(num_samples - self.window_samples)
+        return starts
+
+    async def detect_emotion_windowed(self, audio: np.ndarray) -> Tuple[str, float, List[Dict[str, Any]]]:
+        """
+        Detect emotion from a long recording using fixed overlapping windows.
+
+        Windows are classified in batched forward passes and their
+        probabilities averaged into one clip label, so cost grows linearly
+        with duration instead of running attention over the whole clip.
+
+        Args:
+            audio: Mono float32 waveform at 16kHz (see AudioPreprocessor)
+
+        Returns:
+            Tuple of (emotion_label, confidence_score, timeline) where timeline
+            lists {start, end, emotion, confidence} per window (seconds)
+
+        Raises:
+            Exception: If emotion detection fails
+        """
+        return await asyncio.to_thread(profiled("audio_emotion", self._detect_emotion_windowed_sync), audio)
+
+    def _detect_emotion_windowed_sync(self, audio: np.ndarray) -> Tuple[str, float, List[Dict[str, Any]]]:
+        """Blocking implementation of detect_emotion_windowed."""
+        try:
+            starts = self._window_starts(len(audio))
+            windows = [audio[start:start + self.window_samples] for start in starts]
+
+            # Bound peak memory on very long clips by chunking the window batch
+            probabilities = torch.cat([
+                self._predict_probabilities(windows[i:i + self.window_batch_size])
+                for i in range(0, len(windows), self.window_batch_size)
+            ])
 
-            # Get emotion label and map to standard format
-            raw_emotion = self.emotion_labels[predicted_class]
-            emotion = self.emotion_mapping.get(raw_emotion, raw_emotion)
+            timeline = []
+            for start, window, row in zip(starts, windows, probabilities):
+                emotion, confidence = self._to_label(row)
+                timeline.append({
+                    "start": start / 16000,
+                    "end": (start + len(window)) / 16000,
+                    "emotion": emotion,
+                    "confidence": confidence
+                })
 
-            return emotion, confidence
+            # Aggregate over raw classes, then map to the standardized label
+            emotion, confidence = self._to_label(probabilities.mean(dim=0))
+            return emotion, confidence, timeline
 
         except Exception as e:
             raise Exception(f"Audio emotion detection failed: {str(e)}")
@@ -105,11 +253,15 @@ class AudioEmotionService:
 
 # Global instance
 _audio_emotion_service = None
+_audio_emotion_service_lock = threading.Lock()
 
 
 def get_audio_emotion_service() -> AudioEmotionService:
     """Get or create audio emotion service singleton."""
     global _audio_emotion_service
     if _audio_emotion_service is None:
-        _audio_emotion_service = AudioEmotionService()
+        # Models load on a startup worker thread; never build two copies
+        with _audio_emotion_service_lock:
+            if _audio_emotion_service is None:
+                _audio_emotion_service = AudioEmotionService()
     return _audio_emotion_service
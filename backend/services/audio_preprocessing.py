@@ -0,0 +1,130 @@
+import io
+import threading
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Optional, Union
+
+import numpy as np
+import torch
+import torchaudio
+
+
+TARGET_SAMPLE_RATE = 16000
+
+
+@dataclass
+class AudioBuffer:
+    """Decoded audio shared by every stage of the analysis pipeline.
+
+    Attributes:
+        samples: Mono float32 waveform at 16kHz, shape (num_samples,)
+        sample_rate: Always TARGET_SAMPLE_RATE (kept explicit for model APIs)
+        source_sample_rate: Sample rate of the uploaded file before resampling
+    """
+    samples: np.ndarray
+    sample_rate: int = TARGET_SAMPLE_RATE
+    source_sample_rate: int = TARGET_SAMPLE_RATE
+
+    @property
+    def duration_seconds(self) -> float:
+        """Duration of the decoded audio in seconds."""
+        return len(self.samples) / self.sample_rate
+
+
+class AudioPreprocessor:
+    """
+    Decode an upload once into the 16kHz mono float32 buffer every model expects.
+
+    faster-whisper, Wav2Vec2 and the duration check all need the same
+    representation, so decoding and resampling happen here a single time per
+    request. Resample kernels are cached per source sample rate because
+    building them (a windowed-sinc filter bank) costs more than applying them
+    to a short clip.
+    """
+
+    def __init__(self, target_sample_rate: int = TARGET_SAMPLE_RATE):
+        """Initialize the preprocessor with an empty resampler cache."""
+        self.target_sample_rate = target_sample_rate
+        self._resamplers: Dict[int, torchaudio.transforms.Resample] = {}
+        self._lock = threading.Lock()
+
+    def _get_resampler(self, source_rate: int) -> torchaudio.transforms.Resample:
+        """Get or build the cached resampler for a source sample rate."""
+        resampler = self._resamplers.get(source_rate)
+        if resampler is None:
+            with self._lock:
+                resampler = self._resamplers.get(source_rate)
+                if resampler is None:
+                    resampler = torchaudio.transforms.Resample(source_rate, self.target_sample_rate)
+                    self._resamplers[source_rate] = resampler
+        return resampler
+
+    def resample(self, samples: np.ndarray, source_rate: int) -> np.ndarray:
+        """
+        Resample a mono float32 waveform to 16kHz with the cached kernel.
+
+        Args:
+            samples: Mono waveform at source_rate
+            source_rate: Sample rate of samples
+
+        Returns:
+            Mono float32 waveform at 16kHz
+        """
+        if source_rate == self.target_sample_rate:
+            return samples.astype(np.float32, copy=False)
+        waveform = torch.from_numpy(np.ascontiguousarray(samples, dtype=np.float32)).unsqueeze(0)
+        return self._get_resampler(source_rate)(waveform).squeeze(0).numpy()
+
+    def decode(
+        self,
+        source: Union[str, bytes, BinaryIO],
+        format: Optional[str] = None
+    ) -> AudioBuffer:
+        """
+        Decode audio into a 16kHz mono float32 buffer.
+
+        Args:
+            source: File path, raw file bytes, or a readable binary file object
+            format: Container hint such as "webm" or "mp3" (needed for file objects)
+
+        Returns:
+            AudioBuffer with the resampled mono waveform
+
+        Raises:
+            Exception: If decoding fails
+        """
+        try:
+            if isinstance(source, (bytes, bytearray)):
+                source = io.BytesIO(source)
+
+            waveform, sample_rate = torchaudio.load(source, format=format)
+
+            # Convert to mono if stereo
+            if waveform.shape[0] > 1:
+                waveform = torch.mean(waveform, dim=0, keepdim=True)
+
+            # Resample to 16kHz if needed
+            if sample_rate != self.target_sample_rate:
+                waveform = self._get_resampler(sample_rate)(waveform)
+
+            samples = waveform.squeeze(0).numpy().astype(np.float32, copy=False)
+
+            return AudioBuffer(
+                samples=samples,
+                sample_rate=self.target_sample_rate,
+                source_sample_rate=sample_rate
+            )
+
+        except Exception as e:
+            raise Exception(f"Audio decoding failed: {str(e)}")
+
+
+# Global instance
+_audio_preprocessor = None
+
+
+def get_audio_preprocessor() -> AudioPreprocessor:
+    """Get or create audio preprocessor singleton."""
+    global _audio_preprocessor
+    if _audio_preprocessor is None:
+        _audio_preprocessor = AudioPreprocessor()
+    return _audio_preprocessor
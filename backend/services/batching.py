@@ -0,0 +1,173 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class MicroBatcher:
+    """
+    Gather concurrent single-item calls into batched model invocations.
+
+    Callers `await submit(item)`. The first pending item opens a short
+    window (`max_wait_ms`); the batch is dispatched when the window closes or
+    `max_batch_size` items are waiting, whichever comes first. The batch
+    function runs on a worker thread and must return one result per item, in
+    order. While a batch is running, new items keep accumulating, so under
+    load batches grow on their own.
+
+    With a `bucket_key`, only items sharing the oldest item's key go into a
+    batch (e.g. clips of similar duration), which keeps padding waste low;
+    other buckets wait for the next dispatch.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        name: str = "batcher",
+        bucket_key: Optional[Callable[[Any], Hashable]] = None
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            process_batch: Blocking function mapping a list of items to a list of results
+            max_batch_size: Dispatch as soon as this many items are waiting
+            max_wait_ms: Longest time the oldest item waits for company
+            name: Label used in logs and stats
+            bucket_key: Optional function grouping items that may share a batch
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self.bucket_key = bucket_key
+
+        # (item, future, enqueue time, bucket)
+        self._pending: List[Tuple[Any, asyncio.Future, float, Hashable]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Counters exposed through stats()
+        self._batches_total = 0
+        self._items_total = 0
+        self._max_batch_seen = 0
+
+    def _ensure_worker(self, loop: asyncio.AbstractEventLoop):
+        """Start the dispatch task on the running loop if needed."""
+        if self._worker is not None and self._loop is loop and not self._worker.done():
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._worker = loop.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue one item and wait for its result.
+
+        Args:
+            item: Single input for the batch function
+
+        Returns:
+            The result the batch function produced for this item
+
+        Raises:
+            Exception: Whatever the batch function raised for this batch
+        """
+        loop = asyncio.get_running_loop()
+        self._ensure_worker(loop)
+
+        future = loop.create_future()
+        bucket = self.bucket_key(item) if self.bucket_key else None
+        self._pending.append((item, future, time.monotonic(), bucket))
+        self._wakeup.set()
+        return await future
+
+    def _take_batch(self) -> List[Tuple[Any, asyncio.Future, float, Hashable]]:
+        """Remove the next batch (oldest item's bucket) from the pending list."""
+        if self.bucket_key is None:
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            return batch
+
+        bucket = self._pending[0][3]
+        batch, remaining = [], []
+        for entry in self._pending:
+            if entry[3] == bucket and len(batch) < self.max_batch_size:
+                batch.append(entry)
+            else:
+                remaining.append(entry)
+        self._pending = remaining
+        return batch
+
+    def _ready_count(self) -> int:
+        """Number of pending items that would go into the next batch."""
+        if self.bucket_key is None:
+            return len(self._pending)
+        bucket = self._pending[0][3]
+        return sum(1 for entry in self._pending if entry[3] == bucket)
+
+    async def _run(self):
+        """Dispatch loop: wait for items, hold the window open, run batches."""
+        while True:
+            await self._wakeup.wait()
+            if not self._pending:
+                self._wakeup.clear()
+                continue
+
+            # Keep the window open until it expires or the batch is full
+            deadline = self._pending[0][2] + self.max_wait
+            while self._ready_count() < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self._take_batch()
+            if not self._pending:
+                self._wakeup.clear()
+
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future, float, Hashable]]):
+        """Run one batch on a worker thread and resolve its futures."""
+        # Callers that were cancelled while waiting don't need a result
+        batch = [entry for entry in batch if not entry[1].done()]
+        if not batch:
+            return
+
+        items = [entry[0] for entry in batch]
+        try:
+            results = await asyncio.to_thread(self.process_batch, items)
+            if len(results) != len(items):
+                raise Exception(f"{self.name}: expected {len(items)} results, got {len(results)}")
+        except Exception as e:
+            for _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self._batches_total += 1
+        self._items_total += len(items)
+        self._max_batch_seen = max(self._max_batch_seen, len(items))
+
+        for (_, future, _, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get batch counts and sizes."""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "pending": len(self._pending),
+            "batches_total": self._batches_total,
+            "items_total": self._items_total,
+            "avg_batch_size": self._items_total / self._batches_total if self._batches_total else 0.0,
+            "max_batch_seen": self._max_batch_seen,
+        }
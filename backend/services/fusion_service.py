@@ -1,14 +1,154 @@
-from sqlalchemy.orm import Session
+import asyncio
+import hashlib
+import json
+import time
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.voice_matrix import VoiceMatrix
-from typing import Dict, Optional
+from core.config import get_settings
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class FusionMatrixCache:
+    """
+    In-memory copy of the voice_matrix table.
+
+    The matrix is ~49 rows and almost never changes, so it is loaded once and
+    looked up by (audio_emotion, text_emotion) without reading the rows again.
+    At most every `probe_seconds`, a one-row aggregate (row count, max id
+    and total text length) is compared with the loaded matrix's, and the
+    table is reloaded when it differs, so edits made in psql show up within
+    a second or so. An edit the probe cannot see (same lengths) is picked up
+    by the full re-read every `refresh_seconds`. The ETag is derived from the
+    row contents, so clients only see a new ETag when the matrix actually
+    changed.
+    """
+
+    def __init__(self, refresh_seconds: float, probe_seconds: float):
+        """Initialize an empty cache."""
+        self.refresh_seconds = refresh_seconds
+        self.probe_seconds = probe_seconds
+        self._entries: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._fallback: Optional[Dict[str, str]] = None
+        self._payload: List[Dict[str, Any]] = []
+        self._etag: Optional[str] = None
+        self._version: Optional[Tuple[Any, ...]] = None
+        self._loaded_at: Optional[float] = None
+        self._probed_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _is_stale(self) -> bool:
+        """Check whether the cache needs (re)loading."""
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds
+
+    def _probe_due(self) -> bool:
+        """Check whether the loaded matrix should be compared with the table."""
+        return self._probed_at is not None and time.monotonic() - self._probed_at >= self.probe_seconds
+
+    @staticmethod
+    async def _read_version(db: AsyncSession) -> Tuple[Any, ...]:
+        """Cheap fingerprint of voice_matrix: row count, max id and total text length."""
+        text_length = (
+            func.length(VoiceMatrix.audio_emotion) + func.length(VoiceMatrix.text_emotion)
+            + func.length(VoiceMatrix.final_mood) + func.length(VoiceMatrix.emoji)
+            + func.coalesce(func.length(VoiceMatrix.description), 0)
+        )
+        row = (await db.execute(
+            select(func.count(), func.max(VoiceMatrix.id), func.coalesce(func.sum(text_length), 0))
+        )).one()
+        return tuple(row)
+
+    async def _load(self, db: AsyncSession):
+        """Read the whole matrix and rebuild the lookup dict, fallback and payload."""
+        version = await self._read_version(db)
+        rows = (await db.execute(select(VoiceMatrix).order_by(VoiceMatrix.id))).scalars().all()
+
+        entries = {}
+        payload = []
+        for row in rows:
+            entries[(row.audio_emotion, row.text_emotion)] = {
+                "final_mood": row.final_mood,
+                "emoji": row.emoji,
+                "description": row.description or ""
+            }
+            payload.append({
+                "id": row.id,
+                "audio_emotion": row.audio_emotion,
+                "text_emotion": row.text_emotion,
+                "final_mood": row.final_mood,
+                "emoji": row.emoji,
+                "description": row.description
+            })
+
+        # Fallback: if no exact match, use the neutral/neutral entry
+        fallback = None
+        neutral = entries.get(("neutral", "neutral"))
+        if neutral:
+            fallback = {
+                "final_mood": neutral["final_mood"],
+                "emoji": neutral["emoji"],
+                "description": "No exact match found, defaulting to neutral mood."
+            }
+
+        body = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+
+        self._entries = entries
+        self._fallback = fallback
+        self._payload = payload
+        self._etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self._version = version
+        self._loaded_at = self._probed_at = time.monotonic()
+        print(f"[INFO] Fusion matrix cache loaded ({len(rows)} entries)")
+
+    async def ensure_loaded(self, db: AsyncSession):
+        """Load the matrix if it was never loaded, changed, or the refresh interval passed."""
+        if not self._is_stale() and not self._probe_due():
+            return
+        async with self._lock:
+            if not self._is_stale() and self._probe_due():
+                self._probed_at = time.monotonic()
+                if await self._read_version(db) != self._version:
+                    print("[INFO] Fusion matrix changed; reloading")
+                    self._loaded_at = None
+            if self._is_stale():
+                await self._load(db)
+
+    async def lookup(self, db: AsyncSession, audio_emotion: str, text_emotion: str) -> Optional[Dict[str, str]]:
+        """Get the matrix entry (or the neutral fallback) for an emotion pair."""
+        await self.ensure_loaded(db)
+        entry = self._entries.get((audio_emotion, text_emotion))
+        if entry:
+            return dict(entry)
+        return dict(self._fallback) if self._fallback else None
+
+    async def snapshot(self, db: AsyncSession) -> Tuple[List[Dict[str, Any]], str]:
+        """Get all entries and their ETag."""
+        await self.ensure_loaded(db)
+        return self._payload, self._etag
+
+
+# Global instance
+_matrix_cache = None
+
+
+def get_matrix_cache() -> FusionMatrixCache:
+    """Get or create fusion matrix cache singleton."""
+    global _matrix_cache
+    if _matrix_cache is None:
+        settings = get_settings()
+        _matrix_cache = FusionMatrixCache(
+            refresh_seconds=settings.FUSION_MATRIX_REFRESH_SECONDS,
+            probe_seconds=settings.FUSION_MATRIX_PROBE_SECONDS
+        )
+    return _matrix_cache
 
 
 class FusionService:
     """Service for fusing audio and text emotions using the fusion matrix."""
 
     @staticmethod
-    def get_final_mood(
-        db: Session,
+    async def get_final_mood(
+        db: AsyncSession,
         audio_emotion: str,
         text_emotion: str
     ) -> Dict[str, str]:
@@ -16,7 +156,7 @@ class FusionService:
         Get final mood by looking up fusion matrix.
 
         Args:
-            db: Database session
+            db: Database session (only used when the cache needs loading)
             audio_emotion: Emotion detected from audio
             text_emotion: Emotion detected from text
 
@@ -31,31 +171,10 @@ class FusionService:
             audio_emotion = audio_emotion.lower()
             text_emotion = text_emotion.lower()
 
-            # Look up in fusion matrix
-            matrix_entry = db.query(VoiceMatrix).filter(
-                VoiceMatrix.audio_emotion == audio_emotion,
-                VoiceMatrix.text_emotion == text_emotion
-            ).first()
-
-            if matrix_entry:
-                return {
-                    "final_mood": matrix_entry.final_mood,
-                    "emoji": matrix_entry.emoji,
-                    "description": matrix_entry.description or ""
-                }
-
-            # Fallback: if no exact match, try with both as neutral
-            matrix_entry = db.query(VoiceMatrix).filter(
-                VoiceMatrix.audio_emotion == "neutral",
-                VoiceMatrix.text_emotion == "neutral"
-            ).first()
-
+            # Look up in the cached fusion matrix (falls back to neutral/neutral)
+            matrix_entry = await get_matrix_cache().lookup(db, audio_emotion, text_emotion)
             if matrix_entry:
-                return {
-                    "final_mood": matrix_entry.final_mood,
-                    "emoji": matrix_entry.emoji,
-                    "description": "No exact match found, defaulting to neutral mood."
-                }
+                return matrix_entry
 
             # Ultimate fallback
             return {
@@ -68,6 +187,12 @@ class FusionService:
             raise Exception(f"Fusion matrix lookup failed: {str(e)}")
 
     @staticmethod
-    def get_all_matrix_entries(db: Session):
+    async def get_all_matrix_entries(db: AsyncSession) -> List[Dict[str, Any]]:
         """Get all fusion matrix entries."""
-        return db.query(VoiceMatrix).all()
+        entries, _ = await get_matrix_cache().snapshot(db)
+        return entries
+
+    @staticmethod
+    async def get_matrix_snapshot(db: AsyncSession) -> Tuple[List[Dict[str, Any]], str]:
+        """Get all fusion matrix entries together with their ETag."""
+        return await get_matrix_cache().snapshot(db)
@@ -0,0 +1,284 @@
+import asyncio
+import json
+import os
+import shutil
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Set
+
+from core.admission import get_admission_controller
+from core.config import get_settings
+from services.analysis_pipeline import get_analysis_pipeline
+from services.model_loader import get_model_loader
+
+
+class JobQueueFull(Exception):
+    """Raised when the job backlog is at JOB_QUEUE_MAX_SIZE."""
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Don't follow webhook redirects (they could lead off the allow-list)."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_webhook_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def callback_allowed(url: str) -> bool:
+    """Whether url is an http(s) URL on a host in JOB_CALLBACK_ALLOWED_HOSTS."""
+    parsed = urllib.parse.urlsplit(url)
+    allowed = {str(host).lower() for host in get_settings().JOB_CALLBACK_ALLOWED_HOSTS}
+    return parsed.scheme in ("http", "https") and (parsed.hostname or "").lower() in allowed
+
+
+class JobQueue:
+    """
+    In-process queue for asynchronous analyses.
+
+    Uploads are written to `storage_dir` and a job id is returned at once;
+    a fixed pool of worker tasks runs the analyses in the background, so
+    accepting work is decoupled from inference capacity. Workers share the
+    process's already-loaded models. Finished jobs are kept for
+    `result_ttl_seconds` so clients can poll for them, and an optional
+    webhook is called when a job finishes (in its own task, so a slow
+    receiver doesn't hold up the next job).
+    """
+
+    def __init__(
+        self,
+        storage_dir: str,
+        num_workers: int,
+        max_size: int,
+        result_ttl_seconds: float
+    ):
+        """Initialize the queue (workers start with start())."""
+        self.storage_dir = Path(storage_dir)
+        self.num_workers = max(1, num_workers)
+        self.max_size = max_size
+        self.result_ttl_seconds = result_ttl_seconds
+
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._notifications: Set[asyncio.Task] = set()
+        # Slots taken by submits still storing their upload
+        self._reserved = 0
+
+    def start(self):
+        """Create the storage directory and start the worker tasks."""
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._workers = [
+            asyncio.create_task(self._worker(n)) for n in range(self.num_workers)
+        ]
+        print(f"[INFO] Job queue started with {self.num_workers} worker(s)")
+
+    async def stop(self):
+        """
+        Cancel the workers and drop the jobs still queued.
+
+        Jobs only live in memory, so queued jobs can't be resumed by the
+        next process: they are marked failed and their stored uploads
+        deleted. Webhooks already being sent are awaited.
+        """
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        dropped = 0
+        while self._queue is not None and not self._queue.empty():
+            job = self._jobs.get(self._queue.get_nowait())
+            if job is None:
+                continue
+            job["status"] = "failed"
+            job["error"] = "Server shut down before the job ran"
+            job["finished_at"] = time.time()
+            self._discard(Path(job["_path"]))
+            dropped += 1
+        if dropped:
+            print(f"[WARN] Job queue stopped with {dropped} queued job(s); their uploads were deleted")
+
+        await asyncio.gather(*self._notifications, return_exceptions=True)
+
+    def _prune(self):
+        """Forget finished jobs older than the retention period."""
+        cutoff = time.time() - self.result_ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def submit(
+        self,
+        file: BinaryIO,
+        format: str,
+        callback_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Store an upload and enqueue it for analysis.
+
+        Args:
+            file: Validated upload, positioned at the start
+            format: Container hint such as "webm" or "mp3"
+            callback_url: Optional URL that receives the finished job as JSON
+
+        Returns:
+            The new job record
+
+        Raises:
+            JobQueueFull: If the backlog is full
+        """
+        if self._queue is None:
+            raise Exception("Job queue is not running")
+        # Reserve the slot before the (awaited) store, so concurrent submits
+        # can't all pass the check and overfill the queue
+        if self.max_size > 0 and self._queue.qsize() + self._reserved >= self.max_size:
+            raise JobQueueFull("Job queue is full. Please retry later.")
+        self._reserved += 1
+
+        self._prune()
+
+        job_id = uuid.uuid4().hex
+        path = self.storage_dir / f"{job_id}.{format}"
+        try:
+            await asyncio.to_thread(self._store, file, path)
+        except BaseException:
+            self._reserved -= 1
+            self._discard(path)
+            raise
+
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "_path": str(path),
+            "_format": format,
+            "_callback_url": callback_url,
+        }
+        self._reserved -= 1
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            self._discard(path)
+            raise JobQueueFull("Job queue is full. Please retry later.")
+        self._jobs[job_id] = job
+        return job
+
+    @staticmethod
+    def _store(file: BinaryIO, path: Path):
+        """Copy an upload to job storage."""
+        with open(path, "wb") as out:
+            shutil.copyfileobj(file, out, 1024 * 1024)
+
+    @staticmethod
+    def _discard(path: Path):
+        """Delete a stored upload, if it exists."""
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job record by id (None if unknown or expired)."""
+        return self._jobs.get(job_id)
+
+    async def _worker(self, n: int):
+        """Run queued jobs one at a time."""
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
+
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            try:
+                # Fails the job instead of waiting forever if the models failed to load
+                await get_model_loader().wait_ready()
+                pipeline = get_analysis_pipeline()
+                # Shares the inference slots with /api/analyze; waits rather than failing
+                async with get_admission_controller().admit(background=True):
+                    result = await pipeline.decode_and_run(job["_path"], job["_format"])
+                job["result"] = await pipeline.finalize(result)
+                job["status"] = "succeeded"
+            except asyncio.CancelledError:
+                job["error"] = "Server shut down while the job ran"
+                job["status"] = "failed"
+                raise
+            except Exception as e:
+                job["error"] = str(e)
+                job["status"] = "failed"
+            finally:
+                job["finished_at"] = time.time()
+                self._discard(job["_path"])
+
+            print(f"[INFO] Job {job_id} {job['status']} in {job['finished_at'] - job['started_at']:.2f}s (worker {n})")
+
+            if job["_callback_url"]:
+                notification = asyncio.create_task(asyncio.to_thread(self._notify, job))
+                self._notifications.add(notification)
+                notification.add_done_callback(self._notifications.discard)
+
+    @staticmethod
+    def public_view(job: Dict[str, Any]) -> Dict[str, Any]:
+        """Job fields returned to clients (internal fields start with _)."""
+        return {key: value for key, value in job.items() if not key.startswith("_")}
+
+    def _notify(self, job: Dict[str, Any]):
+        """POST the finished job to its webhook; failures are only logged."""
+        if not callback_allowed(job["_callback_url"]):
+            print(f"[WARN] Webhook for job {job['job_id']} skipped: host is not allow-listed")
+            return
+        try:
+            request = urllib.request.Request(
+                job["_callback_url"],
+                data=json.dumps(self.public_view(job)).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                method="POST"
+            )
+            with _webhook_opener.open(request, timeout=10):
+                pass
+        except Exception as e:
+            print(f"[WARN] Webhook for job {job['job_id']} failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth and job counts by status."""
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {
+            "workers": len(self._workers),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_size": self.max_size,
+            "jobs": counts,
+        }
+
+
+# Global instance
+_job_queue = None
+
+
+def get_job_queue() -> JobQueue:
+    """Get or create job queue singleton."""
+    global _job_queue
+    if _job_queue is None:
+        settings = get_settings()
+        _job_queue = JobQueue(
+            storage_dir=settings.JOB_STORAGE_DIR,
+            num_workers=settings.JOB_WORKERS,
+            max_size=settings.JOB_QUEUE_MAX_SIZE,
+            result_ttl_seconds=settings.JOB_RESULT_TTL_SECONDS
+        )
+    return _job_queue
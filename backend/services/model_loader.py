@@ -0,0 +1,192 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+from fastapi import HTTPException
+
+from core.config import get_settings
+from services.audio_emotion import get_audio_emotion_service
+from services.text_emotion import get_text_emotion_service
+from services.voice_activity import get_voice_activity_detector
+from services.asr_cascade import get_asr_cascade
+
+
+def _synthetic_speech(seconds: float = 2.0) -> np.ndarray:
+    """A voiced-like test signal (harmonics of a wobbling pitch) at 16kHz."""
+    t = np.arange(int(seconds * 16000)) / 16000
+    pitch = 140 + 30 * np.sin(2 * np.pi * 3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / 16000
+    signal = sum(np.sin(k * phase) / k for k in range(1, 6))
+    return (0.2 * signal * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))).astype(np.float32)
+
+
+def _load_whisper():
+    """Load the fast faster-whisper model and run one transcription."""
+    service = get_asr_cascade().fast
+    service.load_model()
+    return lambda: service.transcribe_segments(_synthetic_speech())
+
+
+def _load_whisper_escalation():
+    """Load the cascade's larger faster-whisper model and run one transcription."""
+    service = get_asr_cascade().accurate
+    service.load_model()
+    return lambda: service.transcribe_segments(_synthetic_speech())
+
+
+def _load_audio_emotion():
+    """Load Wav2Vec2 and run one forward pass."""
+    service = get_audio_emotion_service()
+    return lambda: service.predict_batch([_synthetic_speech()])
+
+
+def _load_text_emotion():
+    """Load DistilRoBERTa and run one forward pass."""
+    service = get_text_emotion_service()
+    return lambda: service.predict_batch(["warming up the emotion model"])
+
+
+def _load_vad():
+    """Load the voice activity detector and run it once."""
+    detector = get_voice_activity_detector()
+    return lambda: detector.speech_spans(_synthetic_speech())
+
+
+class ModelLoader:
+    """
+    Load every model in parallel at startup and track when each is usable.
+
+    Each loader runs on its own worker thread and is followed by a warmup
+    inference on synthetic input, so allocator and kernel warm-up happen
+    before the first request instead of during it. The replica reports
+    ready (/health/ready) only when every model has loaded and warmed up.
+    """
+
+    def __init__(self, loaders: Dict[str, Callable[[], Callable[[], Any]]], warmup: bool = True):
+        """
+        Initialize the loader.
+
+        Args:
+            loaders: Model name -> function that loads it and returns its warmup call
+            warmup: Run the warmup inference after loading
+        """
+        self.loaders = loaders
+        self.warmup = warmup
+        self.models: Dict[str, Dict[str, Any]] = {
+            name: {"state": "pending", "load_seconds": None, "warmup_seconds": None, "error": None}
+            for name in loaders
+        }
+        self._finished = asyncio.Event()  # Set once every model is ready or failed
+        self._task: Optional[asyncio.Task] = None
+        self._started_at: Optional[float] = None
+        self._total_seconds: Optional[float] = None
+
+    def start(self):
+        """Start loading in the background (health endpoints answer meanwhile)."""
+        self._started_at = time.time()
+        self._task = asyncio.create_task(self.load_all())
+
+    async def _load(self, name: str):
+        """Load and warm up one model on a worker thread."""
+        model = self.models[name]
+        model["state"] = "loading"
+        try:
+            start_time = time.time()
+            warmup = await asyncio.to_thread(self.loaders[name])
+            model["load_seconds"] = round(time.time() - start_time, 3)
+
+            if self.warmup:
+                model["state"] = "warming_up"
+                start_time = time.time()
+                await asyncio.to_thread(warmup)
+                model["warmup_seconds"] = round(time.time() - start_time, 3)
+
+            model["state"] = "ready"
+            print(f"[TIMING] Model '{name}' loaded in {model['load_seconds']:.2f}s"
+                  f" (warmup {model['warmup_seconds'] or 0:.2f}s)")
+        except Exception as e:
+            model["state"] = "failed"
+            model["error"] = str(e)
+            print(f"[ERROR] Model '{name}' failed to load: {str(e)}")
+
+    async def load_all(self):
+        """Load every model concurrently; mark ready if all succeed."""
+        await asyncio.gather(*(self._load(name) for name in self.loaders))
+        self._total_seconds = round(time.time() - (self._started_at or time.time()), 3)
+        self._finished.set()
+        if self.is_ready:
+            print(f"[INFO] All models ready in {self._total_seconds:.2f}s")
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether every model is loaded and warmed up."""
+        return all(model["state"] == "ready" for model in self.models.values())
+
+    async def wait_ready(self):
+        """
+        Wait until every model is ready (background jobs wait here).
+
+        Raises:
+            RuntimeError: If a model failed to load
+        """
+        await self._finished.wait()
+        if not self.is_ready:
+            raise RuntimeError("Models failed to load")
+
+    def require_ready(self):
+        """
+        Reject a request while models are loading (or failed to load).
+
+        Raises:
+            HTTPException: 503 with Retry-After if not ready
+        """
+        if self.is_ready:
+            return
+        if self.status == "failed":
+            detail = "Models failed to load. See /health/ready."
+        else:
+            detail = "Models are still loading. Please retry shortly."
+        raise HTTPException(
+            status_code=503,
+            detail=detail,
+            headers={"Retry-After": str(get_settings().INFERENCE_RETRY_AFTER)}
+        )
+
+    @property
+    def status(self) -> str:
+        """Overall state: "ready", "failed" (a model could not load) or "loading"."""
+        if self.is_ready:
+            return "ready"
+        if any(model["state"] == "failed" for model in self.models.values()):
+            return "failed"
+        return "loading"
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-model load state and timings."""
+        return {
+            "status": self.status,
+            "total_seconds": self._total_seconds,
+            "models": self.models,
+        }
+
+
+# Global instance
+_model_loader = None
+
+
+def get_model_loader() -> ModelLoader:
+    """Get or create model loader singleton."""
+    global _model_loader
+    if _model_loader is None:
+        settings = get_settings()
+        loaders = {
+            "whisper": _load_whisper,
+            "audio_emotion": _load_audio_emotion,
+            "text_emotion": _load_text_emotion,
+            "vad": _load_vad,
+        }
+        if get_asr_cascade().accurate is not None:
+            loaders["whisper_escalation"] = _load_whisper_escalation
+        _model_loader = ModelLoader(loaders=loaders, warmup=settings.MODEL_WARMUP)
+    return _model_loader
@@ -0,0 +1,251 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import case, func, literal, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.mood_stats import MoodStats
+from models.voice_analysis import VoiceAnalysis
+
+
+# Rollup granularities and their bucket widths
+GRANULARITIES = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+# Columns each distribution in /api/stats is grouped by
+DISTRIBUTION_FIELDS = ("final_mood", "audio_emotion", "text_emotion")
+
+_DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# SQLite bucket starts, in the format SQLAlchemy stores DateTime values in
+_SQLITE_BUCKET_FORMATS = {
+    "hour": "%Y-%m-%d %H:00:00.000000",
+    "day": "%Y-%m-%d 00:00:00.000000",
+}
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Start of the UTC hour or day containing moment."""
+    moment = moment.astimezone(timezone.utc)
+    if granularity == "day":
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+async def record_mood_stats(db: AsyncSession, rows: List[Dict[str, Any]]):
+    """
+    Add analyses to the hourly and daily rollups (without committing).
+
+    Runs in the caller's transaction, so the rollup and voice_analysis are
+    committed (or rolled back) together. Each row is bucketed by the
+    created_at written to voice_analysis, so both tables agree on its hour
+    and day. Rows are pre-aggregated by bucket
+    and (final_mood, audio_emotion, text_emotion), then each granularity
+    gets a single upsert that increments the counters of existing buckets.
+    Upsert rows are sorted by key so concurrent transactions lock existing
+    buckets in the same order and cannot deadlock on each other.
+
+    Args:
+        db: Database session
+        rows: voice_analysis rows being inserted (RECORD_FIELDS and created_at)
+
+    Raises:
+        Exception: If the upsert fails
+    """
+    if not rows:
+        return
+
+    dialect_insert = _DIALECT_INSERTS.get(db.bind.dialect.name)
+    if dialect_insert is None:
+        raise RuntimeError(f"mood_stats upserts are not supported on {db.bind.dialect.name}")
+
+    for granularity in GRANULARITIES:
+        totals: Dict[Tuple[datetime, str, str, str], Dict[str, Any]] = {}
+        for row in rows:
+            start = bucket_start(row["created_at"], granularity)
+            key = (start, row["final_mood"], row["audio_emotion"], row["text_emotion"])
+            entry = totals.setdefault(key, {
+                "analyses": 0,
+                "audio_confidence_sum": 0.0,
+                "text_confidence_sum": 0.0,
+                "audio_emotion_skipped": 0,
+            })
+            entry["analyses"] += 1
+            entry["audio_confidence_sum"] += row["audio_confidence"]
+            entry["text_confidence_sum"] += row["text_confidence"]
+            # Skipped audio emotion reports a confidence of exactly 0 (see
+            # AnalysisPipeline); empty transcripts are never saved
+            entry["audio_emotion_skipped"] += int(row["audio_confidence"] == 0)
+
+        values = [
+            {
+                "granularity": granularity,
+                "bucket_start": start,
+                "final_mood": final_mood,
+                "audio_emotion": audio_emotion,
+                "text_emotion": text_emotion,
+                **entry,
+            }
+            for (start, final_mood, audio_emotion, text_emotion), entry in sorted(totals.items())
+        ]
+        statement = dialect_insert(MoodStats).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                MoodStats.granularity, MoodStats.bucket_start,
+                MoodStats.final_mood, MoodStats.audio_emotion, MoodStats.text_emotion,
+            ],
+            set_={
+                column: getattr(MoodStats, column) + getattr(statement.excluded, column)
+                for column in (
+                    "analyses", "audio_confidence_sum", "text_confidence_sum",
+                    "audio_emotion_skipped",
+                )
+            }
+        )
+        await db.execute(statement)
+
+
+def _bucket_expression(dialect: str, granularity: str):
+    """SQL for the UTC bucket start of voice_analysis.created_at."""
+    # Inlined constants: with bind parameters Postgres would not match the
+    # SELECT and GROUP BY expressions
+    if dialect == "postgresql":
+        utc = literal_column("'UTC'")
+        return func.timezone(utc, func.date_trunc(literal_column(f"'{granularity}'"), func.timezone(utc, VoiceAnalysis.created_at)))
+    return func.strftime(literal_column(f"'{_SQLITE_BUCKET_FORMATS[granularity]}'"), VoiceAnalysis.created_at)
+
+
+async def backfill_mood_stats(db: AsyncSession):
+    """
+    Build the rollup from voice_analysis if mood_stats is still empty.
+
+    Runs at startup, before this process records any analysis: on a
+    deployment upgraded without running 05-add-mood-stats.sql, create_all
+    leaves mood_stats empty, and incremental upserts into buckets that
+    already hold history would otherwise undercount them for good (a later
+    backfill skips buckets that exist). Buckets another process already
+    created are left alone, so concurrent startups don't count twice.
+
+    Args:
+        db: Database session
+
+    Raises:
+        Exception: If the backfill fails
+    """
+    if (await db.execute(select(MoodStats.granularity).limit(1))).first() is not None:
+        return
+
+    dialect = db.bind.dialect.name
+    dialect_insert = _DIALECT_INSERTS.get(dialect)
+    if dialect_insert is None:
+        raise RuntimeError(f"mood_stats upserts are not supported on {dialect}")
+
+    try:
+        for granularity in GRANULARITIES:
+            bucket = _bucket_expression(dialect, granularity)
+            rollup = select(
+                literal(granularity),
+                bucket,
+                VoiceAnalysis.final_mood,
+                VoiceAnalysis.audio_emotion,
+                VoiceAnalysis.text_emotion,
+                func.count(),
+                func.sum(VoiceAnalysis.audio_confidence),
+                func.sum(VoiceAnalysis.text_confidence),
+                func.sum(case((VoiceAnalysis.audio_confidence == 0, 1), else_=0)),
+            ).group_by(bucket, VoiceAnalysis.final_mood, VoiceAnalysis.audio_emotion, VoiceAnalysis.text_emotion)
+            statement = dialect_insert(MoodStats).from_select(
+                [
+                    "granularity", "bucket_start", "final_mood", "audio_emotion", "text_emotion",
+                    "analyses", "audio_confidence_sum", "text_confidence_sum", "audio_emotion_skipped",
+                ],
+                rollup
+            ).on_conflict_do_nothing()
+            await db.execute(statement)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    total = (await db.execute(
+        select(func.coalesce(func.sum(MoodStats.analyses), 0)).where(MoodStats.granularity == "day")
+    )).scalar()
+    if total:
+        print(f"[INFO] Backfilled mood_stats from {total} analyses")
+
+
+async def query_mood_stats(db: AsyncSession, granularity: str, since: datetime, until: datetime) -> Dict[str, Any]:
+    """
+    Read mood distributions and a time series from the rollup.
+
+    Only mood_stats is read, so the cost depends on the number of buckets in
+    the range (and the mood combinations within them), never on how many
+    analyses voice_analysis holds.
+
+    Args:
+        db: Database session
+        granularity: "hour" or "day"
+        since: Start of the range (rounded down to a bucket)
+        until: End of the range (exclusive)
+
+    Returns:
+        Dictionary with granularity, since, until, total, average
+        confidences, skipped audio emotion count, one distribution per
+        DISTRIBUTION_FIELDS column and the series (one entry per non-empty
+        bucket with its analyses and final_mood counts)
+    """
+    since = bucket_start(since, granularity)
+    in_range = (
+        MoodStats.granularity == granularity,
+        MoodStats.bucket_start >= since,
+        MoodStats.bucket_start < until,
+    )
+
+    totals = (await db.execute(
+        select(
+            func.coalesce(func.sum(MoodStats.analyses), 0),
+            func.coalesce(func.sum(MoodStats.audio_confidence_sum), 0.0),
+            func.coalesce(func.sum(MoodStats.text_confidence_sum), 0.0),
+            func.coalesce(func.sum(MoodStats.audio_emotion_skipped), 0),
+        ).where(*in_range)
+    )).one()
+    total, audio_confidence_sum, text_confidence_sum, audio_skipped = totals
+
+    distributions = {}
+    for field in DISTRIBUTION_FIELDS:
+        column = getattr(MoodStats, field)
+        counts = await db.execute(
+            select(column, func.sum(MoodStats.analyses))
+            .where(*in_range)
+            .group_by(column)
+            .order_by(func.sum(MoodStats.analyses).desc())
+        )
+        distributions[field] = {value: int(count) for value, count in counts}
+
+    series: Dict[datetime, Dict[str, Any]] = defaultdict(lambda: {"analyses": 0, "final_mood": {}})
+    buckets = await db.execute(
+        select(MoodStats.bucket_start, MoodStats.final_mood, func.sum(MoodStats.analyses))
+        .where(*in_range)
+        .group_by(MoodStats.bucket_start, MoodStats.final_mood)
+        .order_by(MoodStats.bucket_start)
+    )
+    for start, final_mood, count in buckets:
+        series[start]["analyses"] += int(count)
+        series[start]["final_mood"][final_mood] = int(count)
+
+    return {
+        "granularity": granularity,
+        "since": since,
+        "until": until,
+        "total": int(total),
+        "audio_confidence_avg": round(audio_confidence_sum / total, 4) if total else None,
+        "text_confidence_avg": round(text_confidence_sum / total, 4) if total else None,
+        "skipped": {"audio_emotion": int(audio_skipped)},
+        **distributions,
+        "series": [{"bucket_start": start, **values} for start, values in series.items()],
+    }
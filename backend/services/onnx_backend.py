@@ -0,0 +1,222 @@
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+
+from core.config import get_settings
+
+
+# ONNX Runtime input types -> numpy dtypes
+_ORT_DTYPES = {
+    "tensor(float)": np.float32,
+    "tensor(int64)": np.int64,
+    "tensor(int32)": np.int32,
+}
+
+
+class _LogitsOnly(torch.nn.Module):
+    """Wrap a Hugging Face classifier so the exported graph returns only logits."""
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, *inputs):
+        return self.model(*inputs).logits
+
+
+class OnnxClassifier:
+    """
+    A Hugging Face sequence classifier exported to ONNX and run with ONNX Runtime.
+
+    The model is exported once (dynamic batch and sequence axes), optionally
+    quantized to int8 with dynamic quantization of its MatMul/Gemm weights,
+    and cached on disk, so later startups only open the cached file. Runs
+    on CPU; fp32 PyTorch eager is the alternative backend.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        input_names: List[str],
+        cache_dir: str,
+        quantize: bool = True,
+        num_threads: int = 0
+    ):
+        """
+        Initialize the classifier (call load() before use).
+
+        Args:
+            model_name: Hugging Face model id (names the cache entry)
+            input_names: Model inputs in forward() order
+            cache_dir: Directory holding exported models
+            quantize: Apply dynamic int8 quantization
+            num_threads: ONNX Runtime intra-op threads (0 = one per core)
+        """
+        self.model_name = model_name
+        self.input_names = input_names
+        self.quantize = quantize
+        self.num_threads = num_threads
+        self.model_dir = Path(cache_dir).expanduser() / model_name.replace("/", "--")
+        self.session = None
+        self._input_dtypes: Dict[str, type] = {}
+        self._export_lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        """Path of the model file ONNX Runtime runs."""
+        return self.model_dir / ("model.int8.onnx" if self.quantize else "model.onnx")
+
+    @property
+    def name(self) -> str:
+        """Backend label reported in /api/status."""
+        return "onnx-int8" if self.quantize else "onnx"
+
+    def _export(self, model: torch.nn.Module, sample_inputs: Dict[str, torch.Tensor]):
+        """Export the PyTorch model to model.onnx (and quantize it if enabled)."""
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        fp32_path = self.model_dir / "model.onnx"
+
+        if not fp32_path.exists():
+            print(f"[INFO] Exporting {self.model_name} to ONNX...")
+            tmp_path = fp32_path.with_suffix(".onnx.tmp")
+            dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in self.input_names}
+            dynamic_axes["logits"] = {0: "batch"}
+            with torch.no_grad():
+                torch.onnx.export(
+                    _LogitsOnly(model).eval(),
+                    tuple(sample_inputs[name] for name in self.input_names),
+                    str(tmp_path),
+                    input_names=self.input_names,
+                    output_names=["logits"],
+                    dynamic_axes=dynamic_axes,
+                    opset_version=14,
+                    do_constant_folding=True
+                )
+            os.replace(tmp_path, fp32_path)
+
+        if self.quantize and not self.path.exists():
+            print(f"[INFO] Quantizing {self.model_name} to int8...")
+            tmp_path = self.path.with_suffix(".onnx.tmp")
+            # Linear layers dominate both models; leave convolutions in fp32
+            quantize_dynamic(
+                str(fp32_path),
+                str(tmp_path),
+                op_types_to_quantize=["MatMul", "Gemm"],
+                weight_type=QuantType.QInt8
+            )
+            os.replace(tmp_path, self.path)
+
+    def load(self, model: torch.nn.Module, sample_inputs: Dict[str, torch.Tensor]):
+        """
+        Open the cached export, exporting it first if it is missing.
+
+        Args:
+            model: PyTorch model to export (only used on a cache miss)
+            sample_inputs: Example inputs for tracing, keyed by input name
+
+        Raises:
+            Exception: If onnxruntime is not installed or export fails
+        """
+        import onnxruntime as ort
+
+        with self._export_lock:
+            if not self.path.exists():
+                self._export(model, sample_inputs)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = self.num_threads
+        # Requests already run on separate worker threads
+        options.inter_op_num_threads = 1
+
+        self.session = ort.InferenceSession(str(self.path), options, providers=["CPUExecutionProvider"])
+        self._input_dtypes = {
+            node.name: _ORT_DTYPES.get(node.type, np.float32) for node in self.session.get_inputs()
+        }
+        print(f"[INFO] {self.model_name} running on ONNX Runtime ({self.path.name})")
+
+    def logits(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """
+        Run a forward pass (blocking; ONNX Runtime sessions are thread-safe).
+
+        Args:
+            inputs: Model inputs as returned by the tokenizer/feature extractor
+
+        Returns:
+            Logits tensor (N x classes)
+        """
+        feed = {
+            name: np.ascontiguousarray(inputs[name].cpu().numpy(), dtype=dtype)
+            for name, dtype in self._input_dtypes.items()
+        }
+        return torch.from_numpy(self.session.run(["logits"], feed)[0])
+
+
+def check_parity(
+    name: str,
+    reference: torch.Tensor,
+    candidate: torch.Tensor,
+    tolerance: float
+) -> bool:
+    """
+    Compare two backends' class probabilities on the same inputs.
+
+    Args:
+        name: Model name for the log line
+        reference: PyTorch probabilities (N x classes)
+        candidate: ONNX probabilities (N x classes)
+        tolerance: Largest allowed confidence difference
+
+    Returns:
+        True if predicted labels match and confidences are within tolerance
+        (labels are only compared where PyTorch's top two classes are further
+        apart than the tolerance; near-ties may legitimately flip)
+    """
+    top2 = reference.topk(2, dim=-1).values
+    decisive = (top2[:, 0] - top2[:, 1]) > tolerance
+    labels_match = bool(torch.equal(
+        reference.argmax(dim=-1)[decisive],
+        candidate.argmax(dim=-1)[decisive]
+    ))
+    max_diff = float((reference.max(dim=-1).values - candidate.max(dim=-1).values).abs().max())
+    ok = labels_match and max_diff <= tolerance
+    print(
+        f"[{'INFO' if ok else 'WARN'}] ONNX parity for {name}: "
+        f"labels {'match' if labels_match else 'differ'}, max confidence diff {max_diff:.4f}"
+    )
+    return ok
+
+
+def load_onnx_classifier(
+    model: torch.nn.Module,
+    model_name: str,
+    sample_inputs: Dict[str, torch.Tensor]
+) -> Optional[OnnxClassifier]:
+    """
+    Build the ONNX backend for a classifier from settings.
+
+    Returns:
+        The loaded OnnxClassifier, or None (with a warning) if it cannot be
+        loaded, in which case the caller keeps using PyTorch
+    """
+    settings = get_settings()
+    classifier = OnnxClassifier(
+        model_name=model_name,
+        input_names=list(sample_inputs),
+        cache_dir=settings.ONNX_CACHE_DIR,
+        quantize=settings.ONNX_QUANTIZE,
+        num_threads=settings.ONNX_NUM_THREADS
+    )
+    try:
+        classifier.load(model, sample_inputs)
+    except Exception as e:
+        print(f"[WARN] ONNX backend unavailable for {model_name}, using PyTorch: {str(e)}")
+        return None
+    return classifier
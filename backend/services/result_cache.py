@@ -0,0 +1,107 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from core.cache import LRUCache
+from core.config import get_settings
+
+
+class ResultCache:
+    """
+    Content-addressed cache of finished analyses with in-flight coalescing.
+
+    Keys are the SHA-256 of the uploaded bytes plus the model versions that
+    produced the result. A repeated upload is answered from the LRU; an
+    upload identical to one still being analyzed waits for that analysis
+    instead of running the models a second time.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        """Initialize the cache."""
+        self._results = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        # Counters exposed through stats()
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+
+    @staticmethod
+    def make_key(content_hash: str, model_fingerprint: str) -> str:
+        """Build the cache key for an upload and the models that analyze it."""
+        return f"{content_hash}:{model_fingerprint}"
+
+    def _on_done(self, key: str, task: asyncio.Task):
+        """Store a successful result and drop the in-flight entry."""
+        self._inflight.pop(key, None)
+        if task.cancelled():
+            return
+        # Marks the exception as retrieved even if every caller went away
+        if task.exception() is None:
+            self._results.set(key, task.result())
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, str]:
+        """
+        Return the cached result for key, joining or starting its computation.
+
+        Args:
+            key: Cache key from make_key()
+            compute: Coroutine function producing the result on a miss
+
+        Returns:
+            Tuple of (result, source) where source is "hit", "coalesced" or "miss"
+
+        Raises:
+            Exception: Whatever compute() raised (failures are not cached)
+        """
+        cached = self._results.get(key)
+        if cached is not None:
+            self._hits += 1
+            return cached, "hit"
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._coalesced += 1
+            source = "coalesced"
+        else:
+            self._misses += 1
+            source = "miss"
+            # Run as its own task so one caller disconnecting doesn't cancel the
+            # analysis other callers are waiting on
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, t))
+
+        return await asyncio.shield(task), source
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit, miss and coalescing counts."""
+        lookups = self._hits + self._misses + self._coalesced
+        return {
+            "size": len(self._results),
+            "max_size": self._results.max_size,
+            "in_flight": len(self._inflight),
+            "hits": self._hits,
+            "misses": self._misses,
+            "coalesced": self._coalesced,
+            "hit_rate": (self._hits + self._coalesced) / lookups if lookups else 0.0,
+        }
+
+
+# Global instance
+_result_cache = None
+
+
+def get_result_cache() -> ResultCache:
+    """Get or create result cache singleton."""
+    global _result_cache
+    if _result_cache is None:
+        settings = get_settings()
+        _result_cache = ResultCache(
+            max_size=settings.RESULT_CACHE_SIZE,
+            ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS
+        )
+    return _result_cache
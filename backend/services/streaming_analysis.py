@@ -0,0 +1,273 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from core.config import get_settings
+from services.audio_preprocessing import TARGET_SAMPLE_RATE, get_audio_preprocessor
+from services.audio_emotion import get_audio_emotion_service
+from services.text_emotion import get_text_emotion_service
+from services.asr_cascade import get_asr_cascade
+
+
+SUPPORTED_STREAM_FORMATS = ("pcm16", "float32", "webm", "ogg")
+
+
+class StreamingAnalysisSession:
+    """
+    Incremental analysis of audio that arrives while the user is recording.
+
+    Raw PCM (16-bit or float32, mono, any sample rate) is appended as it
+    arrives; container formats from MediaRecorder (webm/ogg Opus) can only be
+    decoded as a whole, so their bytes are accumulated and re-decoded at each
+    step. Each step transcribes the not-yet-committed tail with
+    faster-whisper; segments that end well before the tail are final, so
+    their text is committed and their audio goes through audio emotion.
+    When recording stops only the last few seconds are left to process.
+    """
+
+    def __init__(self, format: str = "pcm16", sample_rate: int = TARGET_SAMPLE_RATE):
+        """
+        Initialize an empty session.
+
+        Args:
+            format: One of SUPPORTED_STREAM_FORMATS
+            sample_rate: Sample rate of raw PCM frames (ignored for containers)
+
+        Raises:
+            ValueError: If the format is unsupported or sample_rate is not a positive integer
+        """
+        if format not in SUPPORTED_STREAM_FORMATS:
+            raise ValueError(f"Unsupported stream format: {format}")
+        if isinstance(sample_rate, bool) or not isinstance(sample_rate, int) or sample_rate <= 0:
+            raise ValueError(f"sample_rate must be a positive integer (Hz), got {sample_rate!r}")
+
+        settings = get_settings()
+        self.format = format
+        self.sample_rate = sample_rate
+        self.step_seconds = settings.STREAM_STEP_SECONDS
+        self.commit_margin = settings.STREAM_COMMIT_MARGIN_SECONDS
+        self.force_commit_seconds = settings.STREAM_FORCE_COMMIT_SECONDS
+        self.max_seconds = settings.STREAM_MAX_SECONDS
+
+        # Frames arrive on the event loop while a step decodes in a worker thread
+        self._lock = threading.Lock()
+        self._raw_chunks: List[np.ndarray] = []
+        self._raw_samples = 0
+        self._container = bytearray()
+        self._samples = np.zeros(0, dtype=np.float32)
+        self._dirty = False
+        self._started_at = time.monotonic()
+
+        # Everything before `_committed` (in 16kHz samples) is final
+        self._committed = 0
+        self._processed_seconds = 0.0
+        self.segments: List[Dict[str, Any]] = []
+        self.text_emotion: Optional[tuple] = None
+
+    def add_frame(self, data: bytes):
+        """Append one binary frame from the client."""
+        with self._lock:
+            if self.format in ("webm", "ogg"):
+                self._container.extend(data)
+            elif self.format == "pcm16":
+                self._raw_chunks.append(np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0)
+                self._raw_samples += len(data) // 2
+            else:
+                self._raw_chunks.append(np.frombuffer(data, dtype="<f4").copy())
+                self._raw_samples += len(data) // 4
+            self._dirty = True
+
+    def _refresh_samples(self):
+        """Rebuild the 16kHz buffer from everything received so far (blocking)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            if self.format in ("webm", "ogg"):
+                data = bytes(self._container)
+            else:
+                raw = np.concatenate(self._raw_chunks) if self._raw_chunks else np.zeros(0, dtype=np.float32)
+                self._raw_chunks = [raw]
+            self._dirty = False
+
+        preprocessor = get_audio_preprocessor()
+        if self.format in ("webm", "ogg"):
+            try:
+                self._samples = preprocessor.decode(data, self.format).samples
+            except Exception:
+                # A partial container may end mid-frame; keep the last good decode
+                self._dirty = True
+        else:
+            self._samples = preprocessor.resample(raw, self.sample_rate)
+
+    @property
+    def received_seconds(self) -> float:
+        """Seconds of audio received (estimated by wall clock for containers)."""
+        if self.format in ("webm", "ogg"):
+            return time.monotonic() - self._started_at
+        return self._raw_samples / self.sample_rate
+
+    def is_full(self) -> bool:
+        """Check whether the session reached STREAM_MAX_SECONDS (or the upload size limit)."""
+        return (
+            self.received_seconds >= self.max_seconds
+            or len(self._container) > get_settings().MAX_UPLOAD_SIZE
+        )
+
+    def ready_for_step(self) -> bool:
+        """Check whether enough new audio arrived to run another step."""
+        return self.received_seconds - self._processed_seconds >= self.step_seconds
+
+    async def step(self, final: bool = False) -> Dict[str, Any]:
+        """
+        Transcribe the uncommitted tail and analyze newly completed segments.
+
+        Args:
+            final: Commit every remaining segment (recording has stopped)
+
+        Returns:
+            Partial result (see snapshot())
+        """
+        self._processed_seconds = self.received_seconds
+        await asyncio.to_thread(self._refresh_samples)
+        samples = self._samples[:int(self.max_seconds * TARGET_SAMPLE_RATE)]
+
+        tail = samples[self._committed:]
+        if len(tail) == 0:
+            return self.snapshot()
+
+        offset = self._committed / TARGET_SAMPLE_RATE
+        tail_seconds = len(tail) / TARGET_SAMPLE_RATE
+        # Partial results need the fast model's latency; no escalation here
+        segments = await asyncio.to_thread(get_asr_cascade().fast.transcribe_segments, tail)
+
+        # A segment is final once it ends well before the end of the buffer.
+        # If the tail grows past Whisper's 30s window without a pause, commit
+        # everything but the last segment so the tail cannot grow unbounded.
+        commit_until = tail_seconds - self.commit_margin
+        if not final and tail_seconds > self.force_commit_seconds and len(segments) > 1:
+            commit_until = max(commit_until, segments[-2]["end"])
+
+        new_segments = []
+        for segment in segments:
+            if not final and segment["end"] > commit_until:
+                break
+            if segment["text"]:
+                new_segments.append({**segment, "start": segment["start"] + offset, "end": segment["end"] + offset})
+            self._committed = int((offset + segment["end"]) * TARGET_SAMPLE_RATE)
+
+        if final:
+            self._committed = len(samples)
+
+        if new_segments:
+            await self._analyze_segments(samples, new_segments)
+
+        return self.snapshot()
+
+    async def _analyze_segments(self, samples: np.ndarray, new_segments: List[Dict[str, Any]]):
+        """Run audio emotion on new segments and text emotion on the transcript so far."""
+        audio_emotion_service = get_audio_emotion_service()
+
+        async def classify(segment: Dict[str, Any]):
+            start = int(segment["start"] * TARGET_SAMPLE_RATE)
+            # Wav2Vec2 needs a few hundred ms of context for very short segments
+            end = max(start + TARGET_SAMPLE_RATE // 2, int(segment["end"] * TARGET_SAMPLE_RATE))
+            segment["emotion"], segment["confidence"] = await audio_emotion_service.detect_emotion(samples[start:end])
+
+        await asyncio.gather(*(classify(segment) for segment in new_segments))
+        self.segments.extend(new_segments)
+
+        # Text emotion is cheap (and memoized), so rerun it on the full transcript
+        self.text_emotion = await get_text_emotion_service().detect_emotion(self.transcript)
+
+    @property
+    def transcript(self) -> str:
+        """Committed transcript so far."""
+        return " ".join(segment["text"] for segment in self.segments).strip()
+
+    def audio_emotion(self) -> tuple:
+        """Aggregate segment emotions, weighting each by confidence x duration."""
+        scores: Dict[str, float] = {}
+        weights: Dict[str, float] = {}
+        for segment in self.segments:
+            duration = max(segment["end"] - segment["start"], 1e-3)
+            scores[segment["emotion"]] = scores.get(segment["emotion"], 0.0) + segment["confidence"] * duration
+            weights[segment["emotion"]] = weights.get(segment["emotion"], 0.0) + duration
+        if not scores:
+            return "neutral", 0.0
+        emotion = max(scores, key=scores.get)
+        return emotion, scores[emotion] / weights[emotion]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state in the same shape as AnalysisPipeline.run() output."""
+        audio_emotion, audio_confidence = self.audio_emotion()
+        text_emotion, text_confidence = self.text_emotion or ("neutral", 0.0)
+        return {
+            "transcribed_text": self.transcript,
+            "asr_model": get_asr_cascade().fast.model_size,
+            "audio_emotion": audio_emotion,
+            "audio_confidence": audio_confidence,
+            "audio_timeline": [
+                {
+                    "start": segment["start"],
+                    "end": segment["end"],
+                    "emotion": segment["emotion"],
+                    "confidence": segment["confidence"]
+                }
+                for segment in self.segments
+            ],
+            "transcript_segments": [
+                {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+                for segment in self.segments
+            ],
+            "text_emotion": text_emotion,
+            "text_confidence": text_confidence,
+            "duration_seconds": len(self._samples) / TARGET_SAMPLE_RATE,
+        }
+
+
+class StreamingSessionLimiter:
+    """Caps concurrent WebSocket sessions (each one holds a growing audio buffer)."""
+
+    def __init__(self, max_sessions: int):
+        """Initialize the limiter."""
+        self.max_sessions = max_sessions
+        self.active = 0
+        self.total = 0
+        self.rejected = 0
+
+    def acquire(self) -> bool:
+        """Reserve a session slot; False if all are taken."""
+        if self.active >= self.max_sessions:
+            self.rejected += 1
+            return False
+        self.active += 1
+        self.total += 1
+        return True
+
+    def release(self):
+        """Free a session slot."""
+        self.active = max(0, self.active - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get active, total and rejected session counts."""
+        return {
+            "active": self.active,
+            "max_sessions": self.max_sessions,
+            "total": self.total,
+            "rejected": self.rejected,
+        }
+
+
+# Global instance
+_session_limiter = None
+
+
+def get_streaming_session_limiter() -> StreamingSessionLimiter:
+    """Get or create streaming session limiter singleton."""
+    global _session_limiter
+    if _session_limiter is None:
+        _session_limiter = StreamingSessionLimiter(get_settings().STREAM_MAX_SESSIONS)
+    return _session_limiter
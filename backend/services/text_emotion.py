@@ -1,6 +1,13 @@
+import asyncio
+import threading
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from typing import Tuple
+from typing import Dict, List, Tuple
+from core.cache import LRUCache
+from core.config import get_settings
+from core.profiling import current_profile
+from services.batching import MicroBatcher
+from services.onnx_backend import check_parity, load_onnx_classifier
 
 
 class TextEmotionService:
@@ -29,6 +36,78 @@ class TextEmotionService:
             "surprise": "surprised"
         }
 
+        # Concurrent requests are gathered into one padded forward pass
+        settings = get_settings()
+        self.batcher = MicroBatcher(
+            self.predict_batch,
+            max_batch_size=settings.TEXT_BATCH_MAX_SIZE,
+            max_wait_ms=settings.TEXT_BATCH_WAIT_MS,
+            name="text_emotion"
+        )
+
+        # Short utterances ("yes", "thank you") repeat constantly; remember them
+        self.cache = LRUCache(
+            max_size=settings.TEXT_EMOTION_CACHE_SIZE,
+            ttl_seconds=settings.TEXT_EMOTION_CACHE_TTL_SECONDS
+        )
+
+        # Optional ONNX Runtime backend (INFERENCE_BACKEND=onnx)
+        self.onnx = None
+        self.backend = "pytorch"
+        if settings.INFERENCE_BACKEND == "onnx":
+            self._enable_onnx()
+
+    def _enable_onnx(self):
+        """Switch to the ONNX backend if it loads and agrees with PyTorch."""
+        settings = get_settings()
+        if self.device != "cpu":
+            print("[WARN] ONNX backend is CPU-only; text emotion stays on PyTorch")
+            return
+
+        texts = [
+            "i am so happy today!",
+            "this is terrible, i hate it.",
+            "i'm really scared of what might happen tomorrow.",
+            "the meeting is at three o'clock in room four.",
+        ]
+
+        sample_inputs = self._tokenize(texts[:2])
+        onnx = load_onnx_classifier(
+            self.model,
+            self.model_name,
+            {"input_ids": sample_inputs["input_ids"], "attention_mask": sample_inputs["attention_mask"]}
+        )
+        if onnx is None:
+            return
+
+        if settings.ONNX_PARITY_CHECK:
+            reference = self._predict_probabilities(texts)
+            self.onnx = onnx
+            candidate = self._predict_probabilities(texts)
+            if not check_parity(self.model_name, reference, candidate, settings.ONNX_PARITY_TOLERANCE):
+                print("[WARN] Text emotion stays on PyTorch")
+                self.onnx = None
+                return
+
+        self.onnx = onnx
+        self.backend = onnx.name
+        # ONNX Runtime holds its own copy of the weights
+        self.model = None
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize a transcript for classification and caching.
+
+        Only whitespace is collapsed: the model is cased, so changing case
+        would change its labels and confidences. Whitespace is not neutral
+        either (RoBERTa's BPE folds a leading space into the next token), so
+        the result can differ slightly from classifying the raw transcript;
+        it is the normalized text that gets classified, so a cached result
+        is always exactly the model's output for its key.
+        """
+        return " ".join(text.split())
+
     async def detect_emotion(self, text: str) -> Tuple[str, float]:
         """
         Detect emotion from text.
@@ -42,19 +121,85 @@ class TextEmotionService:
         Raises:
             Exception: If emotion detection fails
         """
-        try:
+        if not text or not text.strip():
+            return "neutral", 1.0
+
+        normalized = self.normalize(text)
+        cache_key = (self.model_name, normalized)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Classify the normalized text so a cached result is exactly what the
+        # model returns for its key
+        profile = current_profile()
+        if profile is not None:
+            # A profiled request runs its own forward pass so the time is attributable
+            result = (await asyncio.to_thread(profile.call, "text_emotion", self.predict_batch, [normalized]))[0]
+        else:
+            # Joins the current micro-batch; the forward pass runs on a worker thread
+            result = await self.batcher.submit(normalized)
+        self.cache.set(cache_key, result)
+        return result
+
+    async def detect_emotions(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """
+        Detect emotion for many texts at once (batch analysis).
+
+        Cached and duplicate transcripts are resolved without the model; the
+        rest go through a single padded forward pass.
+
+        Args:
+            texts: Input texts to analyze
+
+        Returns:
+            List of (emotion_label, confidence_score), one per input text
+
+        Raises:
+            Exception: If emotion detection fails
+        """
+        results: Dict[str, Tuple[str, float]] = {}
+        missing: List[str] = []
+        for text in texts:
             if not text or not text.strip():
-                return "neutral", 1.0
+                continue
+            normalized = self.normalize(text)
+            if normalized in results or normalized in missing:
+                continue
+            cached = self.cache.get((self.model_name, normalized))
+            if cached is not None:
+                results[normalized] = cached
+            else:
+                missing.append(normalized)
+
+        if missing:
+            predictions = await asyncio.to_thread(self.predict_batch, missing)
+            for normalized, prediction in zip(missing, predictions):
+                self.cache.set((self.model_name, normalized), prediction)
+                results[normalized] = prediction
+
+        return [
+            results[self.normalize(text)] if text and text.strip() else ("neutral", 1.0)
+            for text in texts
+        ]
 
-            # Tokenize input
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                truncation=True,
-                max_length=512,
-                padding=True
-            )
+    def _tokenize(self, texts: List[str]) -> Dict[str, torch.Tensor]:
+        """Tokenize texts, padding to the longest one in the batch."""
+        return self.tokenizer(
+            texts,
+            return_tensors="pt",
+            truncation=True,
+            max_length=512,
+            padding=True
+        )
 
+    def _predict_probabilities(self, texts: List[str]) -> torch.Tensor:
+        """Run one padded forward pass and return class probabilities (N x classes)."""
+        inputs = self._tokenize(texts)
+
+        if self.onnx is not None:
+            logits = self.onnx.logits(inputs)
+        else:
             # Move to device
             inputs = {k: v.to(self.device) for k, v in inputs.items()}
 
@@ -63,16 +208,34 @@ class TextEmotionService:
                 outputs = self.model(**inputs)
                 logits = outputs.logits
 
-            # Get probabilities
-            probabilities = torch.nn.functional.softmax(logits, dim=-1)
-            predicted_class = torch.argmax(probabilities, dim=-1).item()
-            confidence = probabilities[0][predicted_class].item()
+        # Get probabilities
+        return torch.nn.functional.softmax(logits, dim=-1).cpu()
+
+    def predict_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """
+        Detect emotion for several texts with one padded forward pass (blocking).
+
+        Args:
+            texts: Non-empty input texts
+
+        Returns:
+            List of (emotion_label, confidence_score), one per input text
+
+        Raises:
+            Exception: If emotion detection fails
+        """
+        try:
+            probabilities = self._predict_probabilities(texts)
+            confidences, predicted_classes = torch.max(probabilities, dim=-1)
 
-            # Get emotion label
-            raw_emotion = self.emotion_labels[predicted_class]
-            emotion = self.emotion_mapping.get(raw_emotion, raw_emotion)
+            results = []
+            for predicted_class, confidence in zip(predicted_classes.tolist(), confidences.tolist()):
+                # Get emotion label
+                raw_emotion = self.emotion_labels[predicted_class]
+                emotion = self.emotion_mapping.get(raw_emotion, raw_emotion)
+                results.append((emotion, confidence))
 
-            return emotion, confidence
+            return results
 
         except Exception as e:
             raise Exception(f"Text emotion detection failed: {str(e)}")
@@ -80,11 +243,15 @@ class TextEmotionService:
 
 # Global instance
 _text_emotion_service = None
+_text_emotion_service_lock = threading.Lock()
 
 
 def get_text_emotion_service() -> TextEmotionService:
     """Get or create text emotion service singleton."""
     global _text_emotion_service
     if _text_emotion_service is None:
-        _text_emotion_service = TextEmotionService()
+        # Models load on a startup worker thread; never build two copies
+        with _text_emotion_service_lock:
+            if _text_emotion_service is None:
+                _text_emotion_service = TextEmotionService()
     return _text_emotion_service
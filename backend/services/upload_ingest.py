@@ -0,0 +1,314 @@
+import hashlib
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncGenerator, BinaryIO, Callable, Coroutine, List, Optional, Union
+
+from fastapi import HTTPException, Request, Response, UploadFile
+from fastapi.routing import APIRoute
+from starlette.datastructures import FormData
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+from core.config import get_settings
+
+
+# Room for multipart boundaries, part headers and small form fields
+_FORM_OVERHEAD = 64 * 1024
+
+
+@dataclass
+class IngestedUpload:
+    """A validated upload, ready to decode.
+
+    Attributes:
+        file: Spooled file positioned at the start of the audio data
+        extension: Lower-case file extension including the dot (".webm")
+        size: Size in bytes
+        sha256: Hex digest of the content
+    """
+    file: BinaryIO
+    extension: str
+    size: int
+    sha256: str
+
+    @property
+    def format(self) -> str:
+        """Container hint for the decoder ("webm", "mp3", ...)."""
+        return self.extension.lstrip(".")
+
+
+def _too_large(limit: int) -> HTTPException:
+    """413 response for an upload over limit bytes."""
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size is {limit / (1024*1024)}MB"
+    )
+
+
+class SpooledUploadParser(MultiPartParser):
+    """
+    MultiPartParser whose spool threshold comes from settings.
+
+    Starlette already writes each uploaded file into a SpooledTemporaryFile
+    while parsing the form: small clips stay in memory, large ones spill to
+    disk. Ingest reads straight from that spool instead of copying it, so
+    its threshold is our only per-request buffer. Set on this subclass so
+    Starlette's own parser (and other apps in the process) keep theirs.
+
+    With audio_only, each file part's name and content type are checked
+    (validate_upload_type) as soon as its headers are parsed, so an
+    unsupported upload is rejected before any of its data is spooled.
+    """
+    max_file_size = get_settings().UPLOAD_SPOOL_MAX_MEMORY
+
+    def __init__(self, *args, audio_only: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.audio_only = audio_only
+
+    def on_headers_finished(self) -> None:
+        super().on_headers_finished()
+        upload = self._current_part.file
+        if self.audio_only and upload is not None:
+            try:
+                validate_upload_type(upload)
+            except HTTPException as exc:
+                # Starlette closes the spooled files on MultiPartException
+                raise MultiPartException(exc.detail)
+
+
+class UploadRequest(Request):
+    """Request whose body is capped at max_body_size and whose forms use SpooledUploadParser."""
+
+    def __init__(self, scope, receive, max_body_size: int, audio_only: bool = False):
+        super().__init__(scope, receive)
+        self.max_body_size = max_body_size
+        self.audio_only = audio_only
+
+    async def stream(self) -> AsyncGenerator[bytes, None]:
+        """Yield the body, failing with 413 as soon as it passes max_body_size."""
+        received = 0
+        async for chunk in super().stream():
+            received += len(chunk)
+            if received > self.max_body_size + _FORM_OVERHEAD:
+                raise _too_large(self.max_body_size)
+            yield chunk
+
+    async def _get_form(self, *, max_files: Union[int, float] = 1000, max_fields: Union[int, float] = 1000) -> FormData:
+        content_type = self.headers.get("Content-Type", "")
+        if self._form is None and content_type.startswith("multipart/form-data"):
+            parser = SpooledUploadParser(
+                self.headers, self.stream(), max_files=max_files, max_fields=max_fields, audio_only=self.audio_only
+            )
+            try:
+                self._form = await parser.parse()
+            except MultiPartException as exc:
+                raise HTTPException(status_code=400, detail=exc.message)
+        return await super()._get_form(max_files=max_files, max_fields=max_fields)
+
+
+class UploadRoute(APIRoute):
+    """
+    Route that rejects oversized bodies and unsupported files before spooling them.
+
+    The limit is MAX_UPLOAD_SIZE, or the route's "x-max-body-size"
+    openapi_extra (e.g. batch uploads). A larger Content-Length is rejected
+    with 413 before any of the body is read; bodies without one are counted
+    as they stream in. Per-file limits are still checked by ingest.
+
+    File parts must be audio (400 otherwise, checked on the part headers)
+    unless the route sets "x-audio-parts-only" to False, like batch uploads,
+    which accept zip archives and report invalid items one by one.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[None, None, Response]]:
+        handler = super().get_route_handler()
+        extra = self.openapi_extra or {}
+        max_body_size = extra.get("x-max-body-size", get_settings().MAX_UPLOAD_SIZE)
+        audio_only = extra.get("x-audio-parts-only", True)
+
+        async def upload_route_handler(request: Request) -> Response:
+            content_length = request.headers.get("Content-Length")
+            if content_length and content_length.isdigit() and int(content_length) > max_body_size + _FORM_OVERHEAD:
+                raise _too_large(max_body_size)
+            return await handler(UploadRequest(request.scope, request.receive, max_body_size, audio_only))
+
+        return upload_route_handler
+
+
+def validate_upload_type(file: UploadFile) -> str:
+    """
+    Check an upload's extension and content type.
+
+    UploadRoute runs this on every file part's headers, before the part's
+    data is spooled; ingest_upload checks again for callers outside it.
+
+    Args:
+        file: Uploaded file
+
+    Returns:
+        Lower-case file extension
+
+    Raises:
+        HTTPException: 400 if the format or content type is not allowed
+    """
+    settings = get_settings()
+
+    file_ext = Path(file.filename or "").suffix.lower()
+    if file_ext not in settings.ALLOWED_AUDIO_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file format. Allowed formats: {', '.join(settings.ALLOWED_AUDIO_FORMATS)}"
+        )
+
+    # Browsers label recordings audio/* or video/webm; curl sends octet-stream
+    content_type = (file.content_type or "").split(";")[0].strip().lower()
+    if content_type and not any(content_type.startswith(prefix) for prefix in settings.ALLOWED_AUDIO_CONTENT_TYPES):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported content type: {content_type}"
+        )
+
+    return file_ext
+
+
+async def ingest_upload(file: UploadFile) -> IngestedUpload:
+    """
+    Validate an upload, then hash and size-check it in one streaming pass.
+
+    Nothing is accumulated in Python memory: chunks are hashed and dropped,
+    and the spooled file is rewound for the decoder.
+
+    Args:
+        file: Uploaded file
+
+    Returns:
+        IngestedUpload wrapping the upload's spooled file
+
+    Raises:
+        HTTPException: 400 for unsupported formats, 413 if the file is too large
+    """
+    settings = get_settings()
+    file_ext = validate_upload_type(file)
+
+    # The parser already knows the size; reject oversized files without reading them
+    if file.size is not None and file.size > settings.MAX_UPLOAD_SIZE:
+        raise _too_large(settings.MAX_UPLOAD_SIZE)
+
+    file_size = 0
+    chunk_size = 1024 * 1024  # 1MB chunks
+    content_hash = hashlib.sha256()
+
+    while chunk := await file.read(chunk_size):
+        file_size += len(chunk)
+        if file_size > settings.MAX_UPLOAD_SIZE:
+            raise _too_large(settings.MAX_UPLOAD_SIZE)
+        content_hash.update(chunk)
+
+    await file.seek(0)
+
+    return IngestedUpload(
+        file=file.file,
+        extension=file_ext,
+        size=file_size,
+        sha256=content_hash.hexdigest()
+    )
+
+
+@dataclass
+class BatchUploadItem:
+    """One clip of a batch upload (a file, or a member of a zip archive).
+
+    Attributes:
+        filename: Name reported back to the client
+        format: Container hint for the decoder ("webm", "mp3", ...)
+        source: Spooled file or raw bytes to decode (None if rejected)
+        error: Why the item was rejected, if it was
+    """
+    filename: str
+    format: str = ""
+    source: Optional[Union[BinaryIO, bytes]] = None
+    error: Optional[str] = None
+
+
+def _expand_zip(file: UploadFile, budget: List[int]) -> List[BatchUploadItem]:
+    """Read the audio members of a zip archive, enforcing per-item and total size limits."""
+    settings = get_settings()
+    items = []
+
+    try:
+        archive = zipfile.ZipFile(file.file)
+    except zipfile.BadZipFile:
+        return [BatchUploadItem(filename=file.filename, error="Invalid zip archive")]
+
+    with archive:
+        for member in archive.infolist():
+            name = member.filename
+            if member.is_dir() or name.startswith("__MACOSX/") or Path(name).name.startswith("."):
+                continue
+
+            file_ext = Path(name).suffix.lower()
+            if file_ext not in settings.ALLOWED_AUDIO_FORMATS:
+                items.append(BatchUploadItem(filename=name, error="Unsupported file format"))
+            elif member.file_size > settings.MAX_UPLOAD_SIZE:
+                items.append(BatchUploadItem(filename=name, error="File too large"))
+            elif member.file_size > budget[0]:
+                items.append(BatchUploadItem(filename=name, error="Batch size limit exceeded"))
+            else:
+                budget[0] -= member.file_size
+                items.append(BatchUploadItem(
+                    filename=name,
+                    format=file_ext.lstrip("."),
+                    source=archive.read(member)
+                ))
+
+    return items
+
+
+def collect_batch_uploads(files: List[UploadFile]) -> List[BatchUploadItem]:
+    """
+    Expand a batch upload into validated items.
+
+    Zip archives are unpacked; every other file is validated like a single
+    upload. Invalid items are kept with an error instead of failing the
+    whole batch. Blocking (reads the spooled uploads); call it in a thread.
+
+    Args:
+        files: Uploaded files and/or zip archives
+
+    Returns:
+        List of BatchUploadItem, in upload order
+
+    Raises:
+        HTTPException: 400 if the batch has too many items
+    """
+    settings = get_settings()
+    budget = [settings.BATCH_MAX_TOTAL_SIZE]
+    items: List[BatchUploadItem] = []
+
+    for file in files:
+        if Path(file.filename or "").suffix.lower() == ".zip":
+            items.extend(_expand_zip(file, budget))
+            continue
+
+        try:
+            file_ext = validate_upload_type(file)
+        except HTTPException as e:
+            items.append(BatchUploadItem(filename=file.filename, error=e.detail))
+            continue
+
+        size = file.size or 0
+        if size > settings.MAX_UPLOAD_SIZE:
+            items.append(BatchUploadItem(filename=file.filename, error="File too large"))
+        elif size > budget[0]:
+            items.append(BatchUploadItem(filename=file.filename, error="Batch size limit exceeded"))
+        else:
+            budget[0] -= size
+            items.append(BatchUploadItem(filename=file.filename, format=file_ext.lstrip("."), source=file.file))
+
+    if len(items) > settings.BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files in batch. Maximum is {settings.BATCH_MAX_FILES}"
+        )
+
+    return items
@@ -0,0 +1,226 @@
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+
+from core.config import get_settings
+from services.audio_preprocessing import TARGET_SAMPLE_RATE, AudioBuffer
+
+
+@dataclass
+class TrimmedAudio:
+    """Speech-only audio cut out of a decoded clip.
+
+    Attributes:
+        audio: Speech spans concatenated into one buffer (empty if no speech)
+        spans: (start, end) sample offsets of each span in the original clip
+        source_duration_seconds: Duration of the clip before trimming
+    """
+    audio: AudioBuffer
+    spans: List[Tuple[int, int]]
+    source_duration_seconds: float
+
+    @property
+    def has_speech(self) -> bool:
+        """Whether any speech was found."""
+        return bool(self.spans)
+
+    def chunks(self, max_seconds: float) -> List[Tuple[int, int]]:
+        """
+        Split the trimmed buffer into chunks of at most max_seconds.
+
+        Cuts fall on span joins (the pauses VAD removed) whenever possible;
+        a single span longer than max_seconds is cut at fixed length.
+
+        Args:
+            max_seconds: Longest chunk (Whisper decodes 30s windows)
+
+        Returns:
+            List of (start, end) sample offsets in the trimmed buffer, in order
+        """
+        max_samples = max(1, int(max_seconds * TARGET_SAMPLE_RATE))
+        chunks: List[Tuple[int, int]] = []
+        chunk_start = position = 0
+        for start, end in self.spans:
+            length = end - start
+            if position + length - chunk_start > max_samples and position > chunk_start:
+                chunks.append((chunk_start, position))
+                chunk_start = position
+            position += length
+            while position - chunk_start > max_samples:
+                chunks.append((chunk_start, chunk_start + max_samples))
+                chunk_start += max_samples
+        if position > chunk_start:
+            chunks.append((chunk_start, position))
+        return chunks
+
+    def to_source_seconds(self, seconds: float) -> float:
+        """Map a time in the trimmed buffer back to the original clip."""
+        position = int(seconds * TARGET_SAMPLE_RATE)
+        for start, end in self.spans:
+            length = end - start
+            if position <= length:
+                return (start + position) / TARGET_SAMPLE_RATE
+            position -= length
+        return self.source_duration_seconds
+
+
+class VoiceActivityDetector:
+    """
+    Find speech in a decoded clip and drop the silence around it.
+
+    Recordings often start and end with seconds of silence, and long pauses
+    in between; cutting them once here shrinks the input of every model.
+    Uses the Silero VAD bundled with faster-whisper (no extra download), or
+    a frame-energy detector when VAD_BACKEND is "energy" or Silero is
+    unavailable.
+    """
+
+    def __init__(
+        self,
+        backend: str = "silero",
+        threshold: float = 0.5,
+        energy_threshold_db: float = -45.0,
+        min_speech_ms: int = 250,
+        min_silence_ms: int = 500,
+        speech_pad_ms: int = 200
+    ):
+        """Initialize the detector (Silero loads lazily on first use)."""
+        self.backend = backend
+        self.threshold = threshold
+        self.energy_threshold_db = energy_threshold_db
+        self.min_speech_samples = int(min_speech_ms * TARGET_SAMPLE_RATE / 1000)
+        self.min_silence_samples = int(min_silence_ms * TARGET_SAMPLE_RATE / 1000)
+        self.pad_samples = int(speech_pad_ms * TARGET_SAMPLE_RATE / 1000)
+        self.min_speech_ms = min_speech_ms
+        self.min_silence_ms = min_silence_ms
+        self.speech_pad_ms = speech_pad_ms
+
+        if backend == "silero":
+            try:
+                from faster_whisper.vad import VadOptions, get_speech_timestamps  # noqa: F401
+            except ImportError:
+                print("[WARN] Silero VAD unavailable in faster-whisper, using energy VAD")
+                self.backend = "energy"
+
+    def _silero_spans(self, samples: np.ndarray) -> List[Tuple[int, int]]:
+        """Speech spans from faster-whisper's Silero VAD."""
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+        options = VadOptions(
+            threshold=self.threshold,
+            min_speech_duration_ms=self.min_speech_ms,
+            min_silence_duration_ms=self.min_silence_ms,
+            speech_pad_ms=self.speech_pad_ms
+        )
+        return [(int(span["start"]), int(span["end"])) for span in get_speech_timestamps(samples, options)]
+
+    def _energy_spans(self, samples: np.ndarray) -> List[Tuple[int, int]]:
+        """Speech spans from 30ms frame energy relative to the noise floor."""
+        frame = int(0.03 * TARGET_SAMPLE_RATE)
+        num_frames = len(samples) // frame
+        if num_frames == 0:
+            return []
+
+        frames = samples[:num_frames * frame].reshape(num_frames, frame)
+        energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+        # Louder than the absolute floor and clearly above the quietest frames.
+        # Without that contrast (no pauses, e.g. continuous speech) the quietest
+        # frames are speech too, so only the floor applies; the relative margin
+        # is capped at half the range so the louder frames always stay voiced
+        quiet, loud = (float(value) for value in np.percentile(energy_db, [10, 90]))
+        threshold = self.energy_threshold_db
+        if loud - quiet >= 6.0:
+            threshold = max(threshold, quiet + min(10.0, (loud - quiet) / 2))
+        voiced = np.flatnonzero(energy_db > threshold).tolist()
+        if len(voiced) == 0:
+            return []
+
+        # Group voiced frames, bridging pauses shorter than min_silence
+        spans = []
+        start = prev = voiced[0]
+        for index in voiced[1:]:
+            if (index - prev - 1) * frame >= self.min_silence_samples:
+                spans.append((start * frame, (prev + 1) * frame))
+                start = index
+            prev = index
+        spans.append((start * frame, (prev + 1) * frame))
+
+        padded = []
+        for start, end in spans:
+            if end - start < self.min_speech_samples:
+                continue
+            start = max(0, start - self.pad_samples)
+            end = min(len(samples), end + self.pad_samples)
+            if padded and start <= padded[-1][1]:
+                padded[-1] = (padded[-1][0], end)
+            else:
+                padded.append((start, end))
+        return padded
+
+    def speech_spans(self, samples: np.ndarray) -> List[Tuple[int, int]]:
+        """
+        Find speech in a 16kHz mono waveform.
+
+        Args:
+            samples: Mono float32 waveform at 16kHz
+
+        Returns:
+            List of (start, end) sample offsets, in order
+        """
+        if self.backend == "silero":
+            return self._silero_spans(samples)
+        return self._energy_spans(samples)
+
+    def trim(self, audio: AudioBuffer) -> TrimmedAudio:
+        """
+        Cut a decoded clip down to its speech (blocking).
+
+        Args:
+            audio: Decoded audio buffer
+
+        Returns:
+            TrimmedAudio; with VAD_BACKEND "off" the whole clip is one span
+        """
+        samples = audio.samples
+        if self.backend == "off":
+            spans = [(0, len(samples))] if len(samples) else []
+        else:
+            spans = self.speech_spans(samples)
+
+        if len(spans) == 1 and spans[0] == (0, len(samples)):
+            trimmed = samples
+        elif spans:
+            trimmed = np.concatenate([samples[start:end] for start, end in spans])
+        else:
+            trimmed = np.zeros(0, dtype=np.float32)
+
+        return TrimmedAudio(
+            audio=AudioBuffer(
+                samples=trimmed,
+                sample_rate=audio.sample_rate,
+                source_sample_rate=audio.source_sample_rate
+            ),
+            spans=spans,
+            source_duration_seconds=audio.duration_seconds
+        )
+
+
+# Global instance
+_voice_activity_detector = None
+
+
+def get_voice_activity_detector() -> VoiceActivityDetector:
+    """Get or create voice activity detector singleton."""
+    global _voice_activity_detector
+    if _voice_activity_detector is None:
+        settings = get_settings()
+        _voice_activity_detector = VoiceActivityDetector(
+            backend=settings.VAD_BACKEND,
+            threshold=settings.VAD_THRESHOLD,
+            energy_threshold_db=settings.VAD_ENERGY_THRESHOLD_DB,
+            min_speech_ms=settings.VAD_MIN_SPEECH_MS,
+            min_silence_ms=settings.VAD_MIN_SILENCE_MS,
+            speech_pad_ms=settings.VAD_SPEECH_PAD_MS
+        )
+    return _voice_activity_detector
@@ -1,105 +1,142 @@
+import threading
 from pathlib import Path
+from typing import Any, Dict, List, Union
+import numpy as np
 from faster_whisper import WhisperModel
 import os
+from core.config import get_settings
 
 
 class WhisperLocalService:
     """Service for transcribing audio using local faster-whisper (whisper.cpp based)."""
 
-    def __init__(self, model_size: str = "tiny"):
+    def __init__(self, model_size: str = "tiny", num_workers: int = 1, cpu_threads: int = 0):
         """
         Initialize faster-whisper service.
 
         Args:
             model_size: Model size to use (tiny, base, small, medium, large-v3)
                        Default: tiny (~75MB, 32x realtime speed, good accuracy for short audios)
+            num_workers: Transcriptions the model can run at the same time
+                         (one per calling thread, e.g. chunks of a long clip)
+            cpu_threads: Threads per worker (0 = CTranslate2 default)
         """
         self.model_size = model_size
+        self.num_workers = max(1, num_workers)
+        self.cpu_threads = cpu_threads
         self.model = None
+        self._load_lock = threading.Lock()
         self._model_dir = Path.home() / ".cache" / "faster_whisper_models"
         self._model_dir.mkdir(parents=True, exist_ok=True)
 
     def _ensure_model_loaded(self):
         """Lazy load the whisper model on first use."""
-        if self.model is None:
+        if self.model is not None:
+            return
+        # Transcriptions now run on worker threads; load the model only once
+        with self._load_lock:
+            if self.model is not None:
+                return
             print(f"Loading faster-whisper model: {self.model_size}...")
             # WhisperModel will auto-download model from Hugging Face if not exists
             # device="cpu" for CPU-only systems, change to "cuda" for GPU
             # compute_type="int8" for faster inference on CPU
-            # num_workers=1 to minimize overhead for short audios
+            # num_workers > 1 lets chunks of a long recording decode in parallel
             self.model = WhisperModel(
                 self.model_size,
                 device="cpu",
                 compute_type="int8",
                 download_root=str(self._model_dir),
-                num_workers=1  # Reduce worker overhead for short audios
+                num_workers=self.num_workers,
+                cpu_threads=self.cpu_threads
             )
             print(f"Faster-whisper model '{self.model_size}' loaded successfully!")
 
-    async def transcribe_audio(self, audio_path: str) -> str:
+    def load_model(self):
+        """Load the model now instead of on first use (startup warmup)."""
+        self._ensure_model_loaded()
+
+    def transcribe_segments(self, audio: Union[str, np.ndarray]) -> List[Dict[str, Any]]:
         """
-        Transcribe audio file using local faster-whisper.
+        Transcribe audio and return faster-whisper's segments (blocking).
 
         Args:
-            audio_path: Path to the audio file
+            audio: Path to the audio file, or a mono float32 waveform at 16kHz
 
         Returns:
-            Transcribed text
-
-        Raises:
-            Exception: If transcription fails
+            List of {start, end, text, avg_logprob, no_speech_prob}; times in
+            seconds relative to the start of the audio (may be empty)
         """
-        try:
-            # Ensure model is loaded
-            self._ensure_model_loaded()
-
-            # Transcribe using faster-whisper
-            # Optimized for speed with short audios:
-            # - beam_size=1: Greedy decoding (much faster than beam_size=5)
-            # - vad_filter=False: Skip VAD overhead for short audios
-            # - best_of=1: Single candidate (fastest)
-            # - temperature=0: Deterministic output (no sampling)
-            segments, info = self.model.transcribe(
-                audio_path,
-                beam_size=1,          # Greedy decoding for speed
-                best_of=1,            # Single best candidate
-                temperature=0,        # No sampling
-                vad_filter=False,     # Skip VAD for short audios
-                language="en",        # English for faster processing
-                condition_on_previous_text=False  # Don't condition on history
-            )
-
-            # Collect all segments into a single string
-            transcript_parts = []
-            for segment in segments:
-                transcript_parts.append(segment.text)
-
-            transcript = " ".join(transcript_parts).strip()
-
-            if not transcript:
-                raise Exception("No speech detected in audio file")
-
-            print(f"Transcription completed: {transcript[:100]}..." if len(transcript) > 100 else f"Transcription: {transcript}")
-            return transcript
-
-        except Exception as e:
-            raise Exception(f"Faster-whisper transcription failed: {str(e)}")
-
-
-# Global singleton instance
-_whisper_service_instance = None
-
-
-def get_whisper_service() -> WhisperLocalService:
+        # Ensure model is loaded
+        self._ensure_model_loaded()
+
+        # Transcribe using faster-whisper
+        # Optimized for speed with short audios:
+        # - beam_size=1: Greedy decoding (much faster than beam_size=5)
+        # - vad_filter=False: The analysis pipeline already trimmed silence
+        # - best_of=1: Single candidate (fastest)
+        # - temperature=0: Deterministic output (no sampling)
+        segments, info = self.model.transcribe(
+            audio,
+            beam_size=1,          # Greedy decoding for speed
+            best_of=1,            # Single best candidate
+            temperature=0,        # No sampling
+            vad_filter=False,     # Silence is trimmed upstream (services/voice_activity.py)
+            language="en",        # English for faster processing
+            condition_on_previous_text=False  # Don't condition on history
+        )
+
+        # The generator decodes lazily; consume it here on the worker thread
+        return [
+            {
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text.strip(),
+                "avg_logprob": segment.avg_logprob,
+                "no_speech_prob": segment.no_speech_prob
+            }
+            for segment in segments
+        ]
+
+
+def get_asr_workers() -> int:
+    """Parallel transcriptions per model (ASR_WORKERS, or half the cores if 0)."""
+    workers = get_settings().ASR_WORKERS
+    if workers <= 0:
+        workers = max(1, (os.cpu_count() or 1) // 2)
+    return workers
+
+
+# Global singleton instances, one per model size
+_whisper_service_instances: Dict[str, WhisperLocalService] = {}
+_whisper_service_lock = threading.Lock()
+
+
+def get_whisper_service(model_size: str = "tiny") -> WhisperLocalService:
     """
     Get singleton instance of WhisperLocalService.
 
+    Workers and threads come from ASR_WORKERS: the cores are split between
+    workers so parallel chunk decodes don't oversubscribe the CPU.
+
+    Args:
+        model_size: Model size (the ASR cascade escalates to a larger one)
+
     Returns:
-        Singleton WhisperLocalService instance
+        Singleton WhisperLocalService instance for that size
     """
-    global _whisper_service_instance
-    if _whisper_service_instance is None:
-        # Use "tiny" model for fast transcription of short audios (5-30 seconds)
-        # Change to "base" or "small" if you need better accuracy
-        _whisper_service_instance = WhisperLocalService(model_size="tiny")
-    return _whisper_service_instance
+    # Use "tiny" model for fast transcription of short audios (5-30 seconds)
+    # Larger models are only used for low-confidence transcripts (see ASRCascade)
+    service = _whisper_service_instances.get(model_size)
+    if service is None:
+        with _whisper_service_lock:
+            service = _whisper_service_instances.get(model_size)
+            if service is None:
+                num_workers = get_asr_workers()
+                service = WhisperLocalService(
+                    model_size=model_size,
+                    num_workers=num_workers,
+                    cpu_threads=max(1, (os.cpu_count() or 1) // num_workers)
+                )
+                _whisper_service_instances[model_size] = service
+    return service
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test that /api/history cursors walk every analysis exactly once.
+
+Runs against a throwaway SQLite database unless DATABASE_URL is set.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/history_test.db")
+
+from core.database import SessionLocal, init_db
+from services.analysis_store import query_history, save_analyses
+
+MOODS = ["Happy", "Calm", "Sad", "Angry"]
+
+
+def make_analysis(i: int) -> dict:
+    """A minimal analysis result."""
+    return {
+        "transcribed_text": f"clip {i}",
+        "asr_model": "tiny",
+        "audio_emotion": "neutral",
+        "audio_confidence": 0.5,
+        "text_emotion": "neutral",
+        "text_confidence": 0.5,
+        "final_mood": MOODS[i % len(MOODS)],
+        "emoji": "😐",
+        "description": None,
+    }
+
+
+async def test_pagination():
+    """Save analyses in several batches, then follow the cursor to the end."""
+    print("=" * 60)
+    print("Testing History Pagination")
+    print("=" * 60)
+
+    await init_db()
+
+    print("\n[1/2] Saving 23 analyses in batches (some share a timestamp)...")
+    async with SessionLocal() as db:
+        for start in range(0, 23, 5):
+            await save_analyses(db, [make_analysis(i) for i in range(start, min(start + 5, 23))])
+    print("✓ Saved")
+
+    print("\n[2/2] Walking pages of 4...")
+    seen = []
+    cursor = None
+    async with SessionLocal() as db:
+        for _ in range(20):
+            rows, cursor = await query_history(db, limit=4, cursor=cursor)
+            seen.extend(row["id"] for row in rows)
+            if cursor is None:
+                break
+        else:
+            print("✗ Cursor never reached the last page")
+            return False
+
+    if len(seen) != 23 or len(set(seen)) != 23:
+        print(f"✗ Expected 23 distinct analyses, got {len(seen)} ({len(set(seen))} distinct)")
+        return False
+    if seen != sorted(seen, reverse=True):
+        print(f"✗ Analyses are not newest first: {seen}")
+        return False
+    print(f"✓ {len(seen)} analyses over {(len(seen) + 3) // 4} pages, each exactly once")
+
+    print("\n" + "=" * 60)
+    print("All tests passed! ✓")
+    print("=" * 60)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(test_pagination()) else 1)
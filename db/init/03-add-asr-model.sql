@@ -0,0 +1,12 @@
+-- Record which Whisper model produced each transcript (ASR cascade)
+-- IDEMPOTENT: Safe to run multiple times
+
+ALTER TABLE voice_analysis ADD COLUMN IF NOT EXISTS asr_model VARCHAR(50);
+
+COMMENT ON COLUMN voice_analysis.asr_model IS 'Whisper model size that produced the transcript (NULL for rows before the cascade)';
+
+-- Log completion
+DO $$
+BEGIN
+    RAISE NOTICE 'voice_analysis.asr_model ready';
+END $$;
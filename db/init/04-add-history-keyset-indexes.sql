@@ -0,0 +1,17 @@
+-- Indexes for keyset pagination of /api/history on (created_at, id)
+-- IDEMPOTENT: Safe to run multiple times
+
+-- Newest-first pages: "(created_at, id) < (cursor)" becomes an index range scan,
+-- with id breaking ties between rows created in the same microsecond
+CREATE INDEX IF NOT EXISTS idx_voice_analysis_created_id
+    ON voice_analysis(created_at DESC, id DESC);
+
+-- Pages filtered by final_mood stay a range scan instead of filtering idx_voice_analysis_mood
+CREATE INDEX IF NOT EXISTS idx_voice_analysis_mood_created_id
+    ON voice_analysis(final_mood, created_at DESC, id DESC);
+
+-- Log completion
+DO $$
+BEGIN
+    RAISE NOTICE 'voice_analysis keyset pagination indexes ready';
+END $$;
@@ -0,0 +1,46 @@
+-- Hourly/daily rollup of voice_analysis for /api/stats
+-- Maintained by the backend on every insert; backfilled here from existing rows
+-- IDEMPOTENT: Safe to run multiple times
+
+CREATE TABLE IF NOT EXISTS mood_stats (
+    granularity VARCHAR(10) NOT NULL,
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    final_mood VARCHAR(100) NOT NULL,
+    audio_emotion VARCHAR(50) NOT NULL,
+    text_emotion VARCHAR(50) NOT NULL,
+    analyses INTEGER NOT NULL DEFAULT 0,
+    audio_confidence_sum FLOAT NOT NULL DEFAULT 0,
+    text_confidence_sum FLOAT NOT NULL DEFAULT 0,
+    audio_emotion_skipped INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket_start, final_mood, audio_emotion, text_emotion)
+);
+
+-- Backfill from the history. The backend does the same at startup when the
+-- table is empty, before recording anything, so buckets already present are
+-- complete and left as they are
+INSERT INTO mood_stats (
+    granularity, bucket_start, final_mood, audio_emotion, text_emotion,
+    analyses, audio_confidence_sum, text_confidence_sum, audio_emotion_skipped
+)
+SELECT
+    g.granularity,
+    date_trunc(g.granularity, va.created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+    va.final_mood,
+    va.audio_emotion,
+    va.text_emotion,
+    COUNT(*),
+    SUM(va.audio_confidence),
+    SUM(va.text_confidence),
+    COUNT(*) FILTER (WHERE va.audio_confidence = 0)
+FROM voice_analysis va
+CROSS JOIN (VALUES ('hour'), ('day')) AS g(granularity)
+GROUP BY 1, 2, 3, 4, 5
+ON CONFLICT DO NOTHING;
+
+COMMENT ON TABLE mood_stats IS 'Hourly and daily mood counts and confidence sums, updated on every insert into voice_analysis';
+
+-- Log completion
+DO $$
+BEGIN
+    RAISE NOTICE 'mood_stats rollup ready';
+END $$;
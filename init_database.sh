@@ -52,6 +52,17 @@ else
     echo "⚠ Tables may already exist (this is OK)"
 fi
 
+# Apply migrations
+echo "Applying migrations..."
+if PGPASSWORD=123 psql -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d "$DB_NAME" -f db/init/03-add-asr-model.sql > /dev/null 2>&1 \
+    && PGPASSWORD=123 psql -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d "$DB_NAME" -f db/init/04-add-history-keyset-indexes.sql > /dev/null 2>&1 \
+    && PGPASSWORD=123 psql -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d "$DB_NAME" -f db/init/05-add-mood-stats.sql > /dev/null 2>&1; then
+    echo "✓ Migrations applied successfully"
+else
+    echo "✗ Error applying migrations"
+    exit 1
+fi
+
 # Seed fusion matrix
 echo "Seeding fusion matrix..."
 if PGPASSWORD=123 psql -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d "$DB_NAME" -f db/init/02-seed-fusion-matrix.sql > /dev/null 2>&1; then